@@ -0,0 +1,110 @@
+"""
+Benchmarks the effective-parameter pass on synthetic metadata.
+
+Three shapes are measured: a single dependency chain, whose depth used to be
+bounded by the interpreter's recursion limit, a wide lab of many short
+pipelines fanning into reduction jobs, and a deep branching DAG, whose
+parameter layers go past MAX_LAYER_DEPTH along many paths and get flattened.
+
+    python benchmarks/bench_effective_params.py --depth 200000 --width 50000
+"""
+
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from repx_py.models import Experiment
+
+
+def _job(job_id: str, inputs: List[str], params: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "name": job_id.split("-", 1)[1],
+        "params": params,
+        "stage_type": "simple",
+        "executables": {
+            "main": {
+                "inputs": [
+                    {"job_id": dep_id, "source_output": "out", "target_input": "in"}
+                    for dep_id in inputs
+                ],
+                "outputs": {"out": "$out/out.txt"},
+            }
+        },
+    }
+
+
+def chain_metadata(depth: int) -> Dict[str, Any]:
+    jobs = {}
+    previous: List[str] = []
+    for i in range(depth):
+        job_id = f"{i:08x}-step"
+        jobs[job_id] = _job(job_id, previous, {f"p{i % 16}": i})
+        previous = [job_id]
+    return {
+        "root": {},
+        "runs": {"chain": {"name": "chain", "jobs": jobs}},
+        "jobs": jobs,
+    }
+
+
+def wide_metadata(width: int) -> Dict[str, Any]:
+    jobs = {}
+    producers = []
+    for i in range(width):
+        a_id, b_id = f"{i:08x}-stage-a", f"{i:08x}-stage-b"
+        jobs[a_id] = _job(a_id, [], {"seed": i % 10, "size": 100})
+        jobs[b_id] = _job(b_id, [a_id], {"scale": i % 3})
+        producers.append(b_id)
+    for i in range(0, width, 100):
+        job_id = f"{i:08x}-reduce"
+        jobs[job_id] = _job(job_id, producers[i : i + 100], {"reduce": "sum"})
+    return {"root": {}, "runs": {"wide": {"name": "wide", "jobs": jobs}}, "jobs": jobs}
+
+
+def dag_metadata(size: int, window: int = 200, fan_in: int = 2) -> Dict[str, Any]:
+    rng = random.Random(0)
+    jobs = {}
+    job_ids: List[str] = []
+    for i in range(size):
+        job_id = f"{i:08x}-node"
+        recent = job_ids[-window:]
+        inputs = rng.sample(recent, min(fan_in, len(recent)))
+        jobs[job_id] = _job(job_id, inputs, {f"p{i % 64}": i})
+        job_ids.append(job_id)
+    return {"root": {}, "runs": {"dag": {"name": "dag", "jobs": jobs}}, "jobs": jobs}
+
+
+def bench(label: str, metadata: Dict[str, Any], repeat: int):
+    exp = Experiment(_preloaded_metadata=metadata)
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        exp._calculate_all_effective_params()
+        timings.append(time.perf_counter() - start)
+    jobs = len(exp._metadata["jobs"])
+    best = min(timings)
+    print(
+        f"{label:>6}: {jobs:>9,} jobs  best {best:.3f}s  ({best / jobs * 1e6:.2f} us/job)"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--depth", type=int, default=100_000, help="Chain length.")
+    parser.add_argument("--width", type=int, default=20_000, help="Pipelines.")
+    parser.add_argument("--dag", type=int, default=20_000, help="DAG jobs.")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per shape.")
+    args = parser.parse_args()
+
+    bench("chain", chain_metadata(args.depth), args.repeat)
+    bench("wide", wide_metadata(args.width), args.repeat)
+    bench("dag", dag_metadata(args.dag), args.repeat)
+
+
+if __name__ == "__main__":
+    main()
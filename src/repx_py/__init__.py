@@ -1,13 +1,19 @@
 import logging
 
 from .models import (
+    AmbiguousJobIDError,
     ArtifactResolver,
+    CircularDependencyError,
     Experiment,
     JobCollection,
     JobView,
     LocalCacheResolver,
     ManifestResolver,
 )
+from .federation import FederatedExperiment, FederatedResolver
+from .jobtable import JobGraph
+from .query import Q
+from .watch import LabWatcher
 
 logging.getLogger(__name__).addHandler(logging.NullHandler())
 
@@ -15,8 +21,15 @@ __all__ = [
     "Experiment",
     "JobView",
     "JobCollection",
+    "JobGraph",
+    "Q",
     "ArtifactResolver",
     "LocalCacheResolver",
     "ManifestResolver",
+    "CircularDependencyError",
+    "AmbiguousJobIDError",
+    "FederatedExperiment",
+    "FederatedResolver",
+    "LabWatcher",
 ]
 
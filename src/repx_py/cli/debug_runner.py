@@ -1,11 +1,11 @@
 import argparse
-import json
 import logging
 import os
 import subprocess
 import sys
 from pathlib import Path
 
+from repx_py import codec
 from repx_py.models import Experiment, JobView, LocalCacheResolver
 
 logging.basicConfig(
@@ -60,7 +60,7 @@ def generate_logic_manifest(job: JobView, job_cache_dir: Path, output_json_path:
         final_json[target_input] = final_path_str
 
     with open(output_json_path, "w") as f:
-        json.dump(final_json, f, indent=2)
+        codec.dump(final_json, f, indent=2)
 
 
 def execute_job(
@@ -124,20 +124,33 @@ def ensure_job_is_run(
     lab_path: Path,
     job_cache_dir: Path,
 ):
-    """Recursively runs dependencies and then the job itself, with caching."""
-    success_marker = job_cache_dir / job.id / "repx" / "SUCCESS"
-    if success_marker.exists():
-        return
-
-    for dep_job in job.dependencies:
-        ensure_job_is_run(
-            dep_job,
-            exp,
-            lab_path,
-            job_cache_dir,
-        )
-
-    execute_job(job, lab_path, job_cache_dir)
+    """Runs dependencies and then the job itself, with caching."""
+
+    def is_done(job: JobView) -> bool:
+        return (job_cache_dir / job.id / "repx" / "SUCCESS").exists()
+
+    # Post-order walk with an explicit stack, so deep pipelines do not hit the
+    # recursion limit. A job is expanded once, and only runs once all of its
+    # dependencies have run, however many branches share them.
+    expanded = set()
+    executed = set()
+    stack = [(job, False)]
+    while stack:
+        current, ready = stack.pop()
+        if current.id in executed:
+            continue
+        if ready:
+            execute_job(current, lab_path, job_cache_dir)
+            executed.add(current.id)
+        elif current.id not in expanded:
+            expanded.add(current.id)
+            if is_done(current):
+                executed.add(current.id)
+                continue
+            stack.append((current, True))
+            for dep_job in reversed(current.dependencies):
+                if dep_job.id not in expanded:
+                    stack.append((dep_job, False))
 
 
 def main():
@@ -147,7 +160,11 @@ def main():
         current_dir = Path(os.getcwd())
 
     parser = argparse.ArgumentParser(description="Debug runner for RepX experiments.")
-    parser.add_argument("--job", required=True, help="The ID of the job to run.")
+    parser.add_argument(
+        "--job",
+        required=True,
+        help="The ID of the job to run, or a prefix of it that no other job ID has.",
+    )
     parser.add_argument(
         "--lab", default=current_dir, type=Path, help="Path to the lab directory."
     )
@@ -165,13 +182,19 @@ def main():
     )
 
     try:
-        exp = Experiment(lab_path, resolver=LocalCacheResolver(job_cache_dir))
+        exp = Experiment(
+            lab_path, resolver=LocalCacheResolver(job_cache_dir), lazy_params=True
+        )
     except FileNotFoundError as e:
         logger.error(f"Error: {e}")
         logger.error("Hint: Make sure the lab path is correct.")
         sys.exit(1)
 
-    target_job = exp.get_job(job_id)
+    try:
+        target_job = exp.get_job(job_id)
+    except KeyError as e:
+        logger.error(f"Error: {e.args[0]}")
+        sys.exit(1)
 
     logger.info(f"Starting debug run for job: {target_job.id}")
     job_cache_dir.mkdir(exist_ok=True)
@@ -1,9 +1,9 @@
 import argparse
-import json
 import logging
 import sys
 from pathlib import Path
 
+from repx_py import codec
 from repx_py.models import Experiment
 
 logging.basicConfig(level=logging.INFO, format="%(message)s", stream=sys.stderr)
@@ -43,10 +43,10 @@ def main():
 
     if args.output:
         with open(args.output, "w") as f:
-            json.dump(all_params, f, indent=2)
+            codec.dump(all_params, f, indent=2)
         logger.info(f"\nSuccessfully wrote effective parameters to '{args.output}'")
     else:
-        print(json.dumps(all_params, indent=2))
+        print(codec.dumps(all_params, indent=2))
 
 
 if __name__ == "__main__":
@@ -0,0 +1,151 @@
+import json
+import logging
+import os
+from typing import IO, Any, Callable, Dict, Mapping, Optional, Union
+
+logger = logging.getLogger(__name__)
+
+BACKEND_ENV_VAR = "REPX_JSON_BACKEND"
+
+
+def _encode_default(obj: Any) -> Any:
+    """Encodes read-only mappings, such as effective parameters, as objects."""
+    if isinstance(obj, Mapping):
+        return dict(obj.items())
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+class JSONCodec:
+    """JSON decoding and encoding through the standard library."""
+
+    name = "json"
+
+    def loads(self, data: Union[str, bytes]) -> Any:
+        return json.loads(data)
+
+    def load(self, fp: IO) -> Any:
+        return self.loads(fp.read())
+
+    def dumps(
+        self, obj: Any, indent: Optional[int] = None, sort_keys: bool = False
+    ) -> str:
+        return json.dumps(
+            obj, indent=indent, sort_keys=sort_keys, default=_encode_default
+        )
+
+    def dump(
+        self,
+        obj: Any,
+        fp: IO[str],
+        indent: Optional[int] = None,
+        sort_keys: bool = False,
+    ):
+        fp.write(self.dumps(obj, indent=indent, sort_keys=sort_keys))
+
+    def __repr__(self) -> str:
+        return f"<{type(self).__name__} backend={self.name}>"
+
+
+class OrjsonCodec(JSONCodec):
+    """
+    JSON decoding and encoding through orjson. Indents other than 2 fall back to
+    the standard library, which orjson does not support. Output differs from the
+    standard library in that non-ASCII characters are written as UTF-8 rather
+    than escaped, and NaN and infinities as null.
+
+    Documents orjson rejects, such as ones holding NaN or Infinity, are decoded
+    by the standard library instead. Integers above 64 bits still decode as
+    floats, which is why this backend must be chosen explicitly.
+    """
+
+    name = "orjson"
+
+    def __init__(self):
+        import orjson
+
+        self._orjson = orjson
+
+    def loads(self, data: Union[str, bytes]) -> Any:
+        try:
+            return self._orjson.loads(data)
+        except self._orjson.JSONDecodeError:
+            logger.debug("orjson rejected a document, decoding it with json")
+            return json.loads(data)
+
+    def dumps(
+        self, obj: Any, indent: Optional[int] = None, sort_keys: bool = False
+    ) -> str:
+        if indent not in (None, 2):
+            return super().dumps(obj, indent=indent, sort_keys=sort_keys)
+        option = 0
+        if indent == 2:
+            option |= self._orjson.OPT_INDENT_2
+        if sort_keys:
+            option |= self._orjson.OPT_SORT_KEYS
+        return self._orjson.dumps(obj, default=_encode_default, option=option).decode()
+
+
+_BACKENDS: Dict[str, Callable[[], JSONCodec]] = {
+    "orjson": OrjsonCodec,
+    "json": JSONCodec,
+}
+_instances: Dict[str, JSONCodec] = {}
+
+
+def available_backends() -> list:
+    """Returns the names of the backends that can be loaded, fastest first."""
+    names = []
+    for name in _BACKENDS:
+        try:
+            get_codec(name)
+        except ImportError:
+            continue
+        names.append(name)
+    return names
+
+
+def get_codec(backend: Optional[str] = None) -> JSONCodec:
+    """
+    Returns the codec for the given backend name. Without one, the backend named
+    by the REPX_JSON_BACKEND environment variable is used, and otherwise the
+    standard library. 'auto' selects the fastest installed backend. Pinning a
+    backend that is not installed raises ImportError.
+    """
+    backend = backend or os.environ.get(BACKEND_ENV_VAR) or "json"
+    if backend == "auto":
+        for name in _BACKENDS:
+            try:
+                return get_codec(name)
+            except ImportError:
+                continue
+
+    if backend not in _BACKENDS:
+        raise ValueError(
+            f"Unknown JSON backend '{backend}'. "
+            f"Choose one of: auto, {', '.join(_BACKENDS)}."
+        )
+    if backend not in _instances:
+        _instances[backend] = _BACKENDS[backend]()
+        logger.debug(f"Using JSON backend '{backend}'")
+    return _instances[backend]
+
+
+def loads(data: Union[str, bytes]) -> Any:
+    return get_codec().loads(data)
+
+
+def load(fp: IO) -> Any:
+    return get_codec().load(fp)
+
+
+# Output written for users (CLI output, labels) goes through the selected backend
+# too. It keeps the standard library's formatting unless orjson is pinned with
+# REPX_JSON_BACKEND (or selected by 'auto'), as the default backend is json.
+
+
+def dumps(obj: Any, indent: Optional[int] = None, sort_keys: bool = False) -> str:
+    return get_codec().dumps(obj, indent=indent, sort_keys=sort_keys)
+
+
+def dump(obj: Any, fp: IO[str], indent: Optional[int] = None, sort_keys: bool = False):
+    get_codec().dump(obj, fp, indent=indent, sort_keys=sort_keys)
@@ -0,0 +1,161 @@
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Tuple, Union
+
+from . import jsonstream
+from .jobtable import JobTable
+from .models import ArtifactResolver, Experiment, JobView, LocalCacheResolver
+
+logger = logging.getLogger(__name__)
+
+LabPaths = Union[Sequence[Union[str, Path]], Mapping[str, Union[str, Path]]]
+
+
+class FederatedResolver(ArtifactResolver):
+    """
+    Resolves artifacts through the resolver of the lab a job belongs to. For a
+    job shared by several labs, the first lab whose resolver finds an existing
+    file wins.
+    """
+
+    def __init__(
+        self,
+        resolvers: Dict[str, ArtifactResolver],
+        job_labs: Dict[str, Tuple[str, ...]],
+    ):
+        self.resolvers = resolvers
+        self._job_labs = job_labs
+
+    def labs_for(self, job_id: str) -> Tuple[str, ...]:
+        """Returns the labels of the labs containing a job, in lab order."""
+        return self._job_labs.get(job_id, ())
+
+    def resolve_path(self, job: "JobView", relative_path: str) -> Path:
+        labs = self.labs_for(job.id)
+        if not labs:
+            raise FileNotFoundError(f"Job '{job.id}' does not belong to any lab.")
+
+        paths = [self.resolvers[lab].resolve_path(job, relative_path) for lab in labs]
+        for path in paths:
+            if path.exists():
+                return path
+        return paths[0]
+
+
+class FederatedExperiment(Experiment):
+    """
+    An Experiment spanning several labs.
+
+    Labs are loaded concurrently into a single job table. Job IDs are
+    content-addressed, so a job found in several labs is stored once and listed
+    once by jobs(). Runs are keyed as '<lab>/<run>', and job outputs are
+    resolved through the resolver of the lab the job comes from.
+    """
+
+    def __init__(
+        self,
+        labs: LabPaths,
+        resolvers: Optional[Mapping[str, ArtifactResolver]] = None,
+        load_workers: Optional[int] = None,
+        snapshot: Union[bool, str, Path] = False,
+        stream_threshold: Optional[int] = jsonstream.DEFAULT_STREAM_THRESHOLD,
+        json_backend: Optional[str] = None,
+    ):
+        """
+        Args:
+            labs: Lab directories, either as a sequence, labelled by directory
+                name, or as a mapping of labels to directories.
+            resolvers: Resolver per lab label. Labs without one use a
+                LocalCacheResolver on './.repx-cache'.
+            load_workers: Number of labs loaded concurrently. Defaults to the
+                number of CPUs.
+            snapshot, stream_threshold, json_backend: Passed on to the
+                Experiment of each lab.
+        """
+        lab_paths = _label_labs(labs)
+        resolvers = dict(resolvers or {})
+        unknown = resolvers.keys() - lab_paths.keys()
+        if unknown:
+            raise ValueError(f"Resolvers given for unknown labs: {sorted(unknown)}")
+        for label in lab_paths:
+            resolvers.setdefault(label, LocalCacheResolver())
+
+        def load(label: str) -> Experiment:
+            logger.debug(f"Loading lab '{label}' from {lab_paths[label]}")
+            return Experiment(
+                lab_paths[label],
+                resolver=resolvers[label],
+                snapshot=snapshot,
+                stream_threshold=stream_threshold,
+                json_backend=json_backend,
+            )
+
+        workers = load_workers or os.cpu_count() or 1
+        with ThreadPoolExecutor(max_workers=min(workers, len(lab_paths))) as pool:
+            lab_experiments = pool.map(load, lab_paths)
+
+            job_table = JobTable()
+            runs: Dict[str, Dict[str, Any]] = {}
+            roots: Dict[str, Dict[str, Any]] = {}
+            job_labs: Dict[str, Tuple[str, ...]] = {}
+            label_sets: Dict[Tuple[str, ...], Tuple[str, ...]] = {}
+            self._lab_effective_params: Dict[str, Dict] = {}
+
+            # Labs are merged in order while later ones are still loading, and
+            # each lab's own Experiment is dropped once merged.
+            for label, lab_exp in zip(lab_paths, lab_experiments):
+                lab_table = lab_exp._metadata["jobs"]
+                job_table.merge(lab_table)
+                roots[label] = lab_exp._metadata["root"]
+                for run_name, run_data in lab_exp._metadata["runs"].items():
+                    runs[f"{label}/{run_name}"] = run_data
+                for job_id in lab_table:
+                    labels = job_labs.get(job_id, ()) + (label,)
+                    job_labs[job_id] = label_sets.setdefault(labels, labels)
+                for job_id, params in lab_exp._effective_params_cache.items():
+                    self._lab_effective_params.setdefault(job_id, params)
+            job_table.release_pools()
+
+        self.lab_paths = lab_paths
+        super().__init__(
+            resolver=FederatedResolver(resolvers, job_labs),
+            json_backend=json_backend,
+            _preloaded_metadata={
+                "root": {"labs": roots},
+                "runs": runs,
+                "jobs": job_table,
+            },
+        )
+        del self._lab_effective_params
+
+    @property
+    def labs(self) -> List[str]:
+        return list(self.lab_paths)
+
+    def labs_for_job(self, job_id: str) -> Tuple[str, ...]:
+        """Returns the labels of the labs containing a job, in lab order."""
+        return self.resolver.labs_for(job_id)
+
+    def _calculate_all_effective_params(self) -> Dict[str, Dict]:
+        # Each lab computed them on load, and shared jobs agree across labs.
+        return self._lab_effective_params
+
+
+def _label_labs(labs: LabPaths) -> Dict[str, Path]:
+    if isinstance(labs, Mapping):
+        lab_paths = {label: Path(path) for label, path in labs.items()}
+    else:
+        lab_paths = {}
+        for path in map(Path, labs):
+            label = path.resolve().name
+            if label in lab_paths:
+                raise ValueError(
+                    f"Labs {lab_paths[label]} and {path} share the label "
+                    f"'{label}'; pass a mapping of labels to paths instead."
+                )
+            lab_paths[label] = path
+    if not lab_paths:
+        raise ValueError("At least one lab must be provided.")
+    return lab_paths
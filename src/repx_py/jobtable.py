@@ -0,0 +1,646 @@
+import sys
+from collections import deque
+from typing import (
+    Any,
+    Deque,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Mapping,
+    NamedTuple,
+    Optional,
+    Tuple,
+    Union,
+)
+
+import numpy as np
+
+DEFAULT_STAGE_TYPE = "simple"
+
+# Executable roles holding a job's input mappings and outputs, per stage type.
+INPUT_ROLES = {"simple": "main", "scatter-gather": "scatter"}
+OUTPUT_ROLES = {"simple": "main", "scatter-gather": "gather"}
+
+_EMPTY_DICT: Dict[str, Any] = {}
+_EMPTY_TUPLE: Tuple[Any, ...] = ()
+
+# Total size in bytes of the single-job closures kept by a JobTable. Each takes
+# 4 bytes per job it holds, so large closures of large labs quickly add up.
+_CLOSURE_CACHE_BYTES = 64 << 20
+
+# Frontier size up to which closures are walked in Python rather than NumPy.
+_SMALL_FRONTIER = 32
+
+
+class PackedJob(NamedTuple):
+    """
+    The compact form of a job record.
+
+    'shape' is the record with its name, params and input job IDs blanked out.
+    It is shared by every job of the same stage, while the job IDs referenced
+    by its input mappings are kept apart, in traversal order, in 'input_ids'.
+    """
+
+    name: Optional[str]
+    params: Dict[str, Any]
+    shape: Dict[str, Any]
+    input_ids: Tuple[Any, ...]
+
+
+class JobGraph(NamedTuple):
+    """
+    The dependency graph of a JobTable as CSR arrays, with one edge per input
+    mapping that references a job of the table.
+
+    The inputs of job i are the edges indptr[i]:indptr[i + 1], in input order:
+    indices holds the index of the job each one reads from, and source_output
+    and target_input the codes of its mapping's keys in source_output_names and
+    target_input_names (-1 where the mapping has none). Job i is job_ids[i],
+    and job_index maps job IDs back to indices.
+    """
+
+    indptr: np.ndarray
+    indices: np.ndarray
+    source_output: np.ndarray
+    target_input: np.ndarray
+    job_ids: List[str]
+    job_index: Dict[str, int]
+    source_output_names: List[Any]
+    target_input_names: List[Any]
+
+
+def _iter_input_lists(record: Dict[str, Any]) -> Iterator[List[Any]]:
+    executables = record.get("executables")
+    if isinstance(executables, dict):
+        for role in executables.values():
+            if isinstance(role, dict) and isinstance(role.get("inputs"), list):
+                yield role["inputs"]
+
+
+def _role_field(record: Dict[str, Any], role: Optional[str], field: str) -> Any:
+    if role is None:
+        return None
+    return record.get("executables", _EMPTY_DICT).get(role, _EMPTY_DICT).get(field)
+
+
+def _fill_inputs(inputs: List[Any], ids: Iterator[Any]) -> List[Any]:
+    return [
+        {**m, "job_id": next(ids)} if isinstance(m, dict) and "job_id" in m else m
+        for m in inputs
+    ]
+
+
+def _code(codes: Dict[Any, int], value: Any) -> int:
+    if value is None:
+        return -1
+    return codes.setdefault(value, len(codes))
+
+
+class JobTable(Mapping[str, Dict[str, Any]]):
+    """
+    Columnar store of job metadata, addressed by job ID or by integer job index.
+
+    Names and stage types are interned, and params dicts and job shapes (see
+    PackedJob) are deduplicated, so a job costs little more than its ID and the
+    IDs of its inputs. Shared values must be treated as read-only.
+
+    As a Mapping, the table maps job IDs to job records in insertion order.
+    Records are rebuilt from the columns on access. Adding a job ID that is
+    already present replaces it in place, keeping its index.
+
+    The table also indexes the dependency graph. 'parents' holds, for each job,
+    the indices of the jobs referenced by its input mappings, in input order,
+    with -1 for jobs not in the table. It is maintained as jobs are added, so
+    a reference is resolved as soon as the job it points to arrives. The
+    reverse index of children is built from it on first use.
+    """
+
+    def __init__(self, jobs: Optional[Mapping[str, Dict[str, Any]]] = None):
+        self.ids: List[str] = []
+        self.names: List[str] = []
+        self.stage_types: List[str] = []
+        self.params: List[Dict[str, Any]] = []
+        self.outputs: List[Dict[str, str]] = []
+        self.shapes: List[Dict[str, Any]] = []
+        self.input_ids: List[Tuple[Any, ...]] = []
+        self.parents: List[Tuple[int, ...]] = []
+        self._index: Dict[str, int] = {}
+        self._waiting: Dict[Any, List[int]] = {}
+        self._graph: Dict[Any, Any] = {}
+        self._closures: Deque[Tuple[bool, int]] = deque()
+        self._closure_bytes = 0
+        self._pools: Optional[Tuple[Dict[str, Any], Dict[str, Any]]] = None
+        self._input_spans: Dict[int, Tuple[Dict[str, Any], int, int]] = {}
+        if jobs:
+            self.update(jobs)
+
+    def index_of(self, job_id: str) -> int:
+        return self._index[job_id]
+
+    def pack(self, job_id: str, job_data: Dict[str, Any]) -> PackedJob:
+        """
+        Returns the compact form of a job record without adding it. Usable as a
+        jsonstream value_hook, so that streamed jobs are compacted on arrival.
+        """
+        if isinstance(job_data, PackedJob):
+            return job_data
+        params_pool, shape_pool = self._get_pools()
+
+        input_ids = []
+        shape = dict(job_data)
+        if "name" in shape:
+            shape["name"] = None
+        if "params" in shape:
+            shape["params"] = None
+        if isinstance(shape.get("executables"), dict):
+            shape["executables"] = executables = dict(shape["executables"])
+            for role_name, role in executables.items():
+                if isinstance(role, dict) and isinstance(role.get("inputs"), list):
+                    inputs = []
+                    for m in role["inputs"]:
+                        if isinstance(m, dict) and "job_id" in m:
+                            job_ref = m["job_id"]
+                            if isinstance(job_ref, str):
+                                job_ref = sys.intern(job_ref)
+                            input_ids.append(job_ref)
+                            m = {**m, "job_id": None}
+                        inputs.append(m)
+                    executables[role_name] = {**role, "inputs": inputs}
+
+        # The repr of decoded JSON tells apart 1, 1.0 and True, unlike equality.
+        shape = shape_pool.setdefault(repr(shape), shape)
+
+        params = job_data.get("params", _EMPTY_DICT)
+        if isinstance(params, dict):
+            params = params_pool.setdefault(repr(params), params)
+
+        name = job_data.get("name", job_id)
+        if isinstance(name, str):
+            name = sys.intern(name)
+        return PackedJob(name, params, shape, tuple(input_ids) or _EMPTY_TUPLE)
+
+    def add(self, job_id: str, job_data: Union[Dict[str, Any], PackedJob]) -> int:
+        """Adds or replaces a job and returns its index."""
+        job_id = sys.intern(job_id)
+        packed = self.pack(job_id, job_data)
+        stage_type = packed.shape.get("stage_type", DEFAULT_STAGE_TYPE)
+        if isinstance(stage_type, str):
+            stage_type = sys.intern(stage_type)
+        outputs = _role_field(packed.shape, OUTPUT_ROLES.get(stage_type), "outputs")
+        columns = (
+            packed.name,
+            stage_type,
+            packed.params,
+            _EMPTY_DICT if outputs is None else outputs,
+            packed.shape,
+            packed.input_ids,
+        )
+
+        index = self._index.get(job_id)
+        if index is None:
+            index = self._index[job_id] = len(self.ids)
+            self.ids.append(job_id)
+            for column, value in zip(self._columns(), columns):
+                column.append(value)
+            self.parents.append(self._resolve_parents(index))
+        else:
+            for column, value in zip(self._columns(), columns):
+                column[index] = value
+            self.parents[index] = self._resolve_parents(index)
+
+        for child in self._waiting.pop(job_id, ()):
+            self.parents[child] = self._resolve_parents(child, wait=False)
+        if self._graph:
+            self._graph.clear()
+            self._closures.clear()
+            self._closure_bytes = 0
+        return index
+
+    def update(self, jobs: Mapping[str, Union[Dict[str, Any], PackedJob]]):
+        for job_id, job_data in jobs.items():
+            self.add(job_id, job_data)
+
+    def merge(self, other: "JobTable"):
+        """
+        Adds the jobs of another table that are not present yet. Job IDs are
+        content-addressed, so a job already present is kept as is. Values pooled
+        in the other table are pooled with this table's own.
+        """
+        params_pool, shape_pool = self._get_pools()
+        shared: Dict[int, Any] = {}
+
+        def share(pool: Dict[str, Any], value: Any) -> Any:
+            # Values are already pooled in 'other', so each is looked up once.
+            key = id(value)
+            if key not in shared:
+                if isinstance(value, dict):
+                    value = pool.setdefault(repr(value), value)
+                shared[key] = value
+            return shared[key]
+
+        for index, job_id in enumerate(other.ids):
+            if job_id not in self._index:
+                self.add(
+                    job_id,
+                    PackedJob(
+                        other.names[index],
+                        share(params_pool, other.params[index]),
+                        share(shape_pool, other.shapes[index]),
+                        other.input_ids[index],
+                    ),
+                )
+
+    def release_pools(self):
+        """
+        Drops the pools used to deduplicate params and shapes, which key each
+        distinct value by its repr, once a batch of jobs has been added. They
+        are rebuilt from the columns when jobs are packed again.
+        """
+        self._pools = None
+
+    def is_empty(self, index: int) -> bool:
+        """Whether the job was stored with an empty record."""
+        return not self.shapes[index]
+
+    def view(self, job_ids: Iterable[str]) -> "JobTableView":
+        return JobTableView(self, job_ids)
+
+    def packed(self, index: int) -> PackedJob:
+        """Returns the compact form of the job stored at an index."""
+        return PackedJob(
+            self.names[index],
+            self.params[index],
+            self.shapes[index],
+            self.input_ids[index],
+        )
+
+    def record(self, index: int) -> Dict[str, Any]:
+        """Rebuilds the full job record stored at an index."""
+        return {
+            key: self._field(index, key, value)
+            for key, value in self.shapes[index].items()
+        }
+
+    def field(self, index: int, key: str, default: Any = None) -> Any:
+        """
+        Returns one field of the job record stored at an index, without
+        rebuilding the rest of the record, or default if the record has none.
+        """
+        shape = self.shapes[index]
+        if key not in shape:
+            return default
+        return self._field(index, key, shape[key])
+
+    def _field(self, index: int, key: str, value: Any) -> Any:
+        if key == "name":
+            return self.names[index]
+        if key == "params":
+            params = self.params[index]
+            # Empty params dicts are shared between jobs, so each caller gets its own.
+            return {} if isinstance(params, dict) and not params else params
+        if key == "executables" and isinstance(value, dict):
+            ids = iter(self.input_ids[index])
+            return {
+                role_name: (
+                    {**role, "inputs": _fill_inputs(role["inputs"], ids)}
+                    if isinstance(role, dict) and isinstance(role.get("inputs"), list)
+                    else role
+                )
+                for role_name, role in value.items()
+            }
+        return value
+
+    def input_mappings(self, index: int) -> List[Dict[str, Any]]:
+        """Returns the input mappings of the role that consumes a job's inputs."""
+        shape = self.shapes[index]
+        role = INPUT_ROLES.get(self.stage_types[index])
+        inputs = _role_field(shape, role, "inputs")
+        if not inputs:
+            # Empty lists are shared between jobs, so each caller gets its own.
+            return [] if inputs is None or isinstance(inputs, list) else inputs
+
+        ids = iter(self.input_ids[index])
+        for input_list in _iter_input_lists(shape):
+            if input_list is inputs:
+                return _fill_inputs(inputs, ids)
+            for m in input_list:
+                if isinstance(m, dict) and "job_id" in m:
+                    next(ids)
+        return inputs
+
+    def role_field(self, index: int, role: str, field: str) -> Any:
+        """Returns a field of one of a job's executable roles, such as its 'path'."""
+        return _role_field(self.shapes[index], role, field)
+
+    def input_job_ids(self, index: int) -> Tuple[Any, ...]:
+        """
+        Returns the 'job_id' values of a job's input mappings (see
+        input_mappings()) in order, without rebuilding the mappings.
+        """
+        start, end = self._input_span(index)
+        return self.input_ids[index][start:end]
+
+    def graph(self) -> JobGraph:
+        """Exports the dependency graph (see JobGraph) in one pass over the table."""
+        source_codes: Dict[Any, int] = {}
+        target_codes: Dict[Any, int] = {}
+        shape_codes: Dict[int, List[Tuple[int, int]]] = {}
+        counts = []
+        indices: List[int] = []
+        source_output: List[int] = []
+        target_input: List[int] = []
+        for index, shape in enumerate(self.shapes):
+            codes = shape_codes.get(id(shape))
+            if codes is None:
+                inputs = _role_field(
+                    shape, INPUT_ROLES.get(self.stage_types[index]), "inputs"
+                )
+                codes = shape_codes[id(shape)] = [
+                    (
+                        _code(source_codes, m.get("source_output")),
+                        _code(target_codes, m.get("target_input")),
+                    )
+                    for m in inputs or ()
+                    if isinstance(m, dict) and "job_id" in m
+                ]
+
+            count = 0
+            for job_ref, (source, target) in zip(self.input_job_ids(index), codes):
+                if not job_ref or job_ref == "self":
+                    continue
+                parent = self._index.get(job_ref)
+                if parent is not None:
+                    indices.append(parent)
+                    source_output.append(source)
+                    target_input.append(target)
+                    count += 1
+            counts.append(count)
+
+        indptr = np.zeros(len(counts) + 1, np.int64)
+        np.cumsum(counts, out=indptr[1:])
+        return JobGraph(
+            indptr,
+            np.array(indices, np.int32),
+            np.array(source_output, np.int32),
+            np.array(target_input, np.int32),
+            list(self.ids),
+            dict(self._index),
+            list(source_codes),
+            list(target_codes),
+        )
+
+    def _resolve_parents(self, index: int, wait: bool = True) -> Tuple[int, ...]:
+        """
+        Maps the input job IDs of a job to indices. With 'wait', unknown IDs are
+        recorded so that the job is resolved again once they are added.
+        """
+        parents = []
+        for job_ref in self.input_job_ids(index):
+            if not job_ref or job_ref == "self":
+                continue
+            parent = self._index.get(job_ref)
+            if parent is None:
+                parent = -1
+                if wait:
+                    self._waiting.setdefault(job_ref, []).append(index)
+            parents.append(parent)
+        return tuple(parents) or _EMPTY_TUPLE
+
+    def parent_indices(self, index: int) -> List[int]:
+        """Returns the distinct indices of a job's parents, in input order."""
+        parents = self.parents[index]
+        if len(parents) == 1:
+            return [] if parents[0] < 0 else [parents[0]]
+        return [parent for parent in dict.fromkeys(parents) if parent >= 0]
+
+    def consumer_indices(self, index: int, output_key: str) -> List[int]:
+        """
+        Returns the indices of the jobs whose input mappings read a given output
+        of a job, in index order. Only the job's children are inspected.
+        """
+        job_id = self.ids[index]
+        consumers = []
+        for child in self.child_indices(index).tolist():
+            for mapping in self.input_mappings(child):
+                if (
+                    isinstance(mapping, dict)
+                    and mapping.get("job_id") == job_id
+                    and mapping.get("source_output") == output_key
+                ):
+                    consumers.append(child)
+                    break
+        return consumers
+
+    def waiting_for(self, job_id: str) -> List[int]:
+        """Returns the indices of the jobs referencing a job not in the table."""
+        return list(self._waiting.get(job_id, ()))
+
+    def child_indices(self, index: int) -> np.ndarray:
+        """Returns the indices of the jobs depending on a job, in index order."""
+        indptr, indices = self.children_csr()
+        return indices[indptr[index] : indptr[index + 1]]
+
+    def children_csr(self) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Returns the reverse dependency index as CSR arrays (indptr, indices): the
+        children of job i are indices[indptr[i]:indptr[i + 1]], without repeats.
+        """
+        return self._csr(upstream=False)
+
+    def parents_csr(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Same as children_csr(), for the distinct parents of each job."""
+        return self._csr(upstream=True)
+
+    def _csr(self, upstream: bool) -> Tuple[np.ndarray, np.ndarray]:
+        cached = self._graph.get(upstream)
+        if cached is None:
+            size = len(self.parents)
+            counts = np.fromiter(map(len, self.parents), np.int64, size)
+            edge_parents = np.fromiter(
+                (parent for parents in self.parents for parent in parents),
+                np.int64,
+                int(counts.sum()),
+            )
+            edge_children = np.repeat(np.arange(size), counts)
+            keep = edge_parents >= 0
+            rows, columns = edge_parents[keep], edge_children[keep]
+            if upstream:
+                rows, columns = columns, rows
+            rows, columns = np.divmod(np.unique(rows * size + columns), max(size, 1))
+            indptr = np.zeros(size + 1, np.int64)
+            np.cumsum(np.bincount(rows, minlength=size), out=indptr[1:])
+            cached = self._graph[upstream] = (indptr, columns.astype(np.int32))
+        return cached
+
+    def _csr_lists(self, upstream: bool) -> Tuple[List[int], List[int]]:
+        cached = self._graph.get(("lists", upstream))
+        if cached is None:
+            indptr, indices = self._csr(upstream)
+            cached = self._graph[("lists", upstream)] = (
+                indptr.tolist(),
+                indices.tolist(),
+            )
+        return cached
+
+    def closure(self, indices: Iterable[int], upstream: bool) -> np.ndarray:
+        """
+        Returns the sorted indices of all the ancestors (with 'upstream') or all
+        the descendants of the given jobs. A given job is only included if it is
+        reachable from one of them.
+
+        The graph is walked breadth first, a whole level at a time. Closures of
+        single jobs are cached until the table changes, oldest first dropped
+        once they take more than _CLOSURE_CACHE_BYTES (64 MiB) together.
+        """
+        indices = np.unique(np.fromiter(indices, np.int64))
+        key = (upstream, int(indices[0])) if len(indices) == 1 else None
+        cached = self._graph.get(key)
+        if cached is not None:
+            return cached
+
+        indptr, neighbours = self._csr(upstream)
+        reached_flags = bytearray(len(self.parents))
+        reached = np.frombuffer(reached_flags, bool)
+        frontier = indices
+        while len(frontier):
+            if len(frontier) <= _SMALL_FRONTIER:
+                # Narrow levels, as in long chains, are cheaper to walk in Python.
+                indptr_list, neighbours_list = self._csr_lists(upstream)
+                level = []
+                for index in frontier:
+                    for neighbour in neighbours_list[
+                        indptr_list[index] : indptr_list[index + 1]
+                    ]:
+                        if not reached_flags[neighbour]:
+                            reached_flags[neighbour] = 1
+                            level.append(neighbour)
+                frontier = (
+                    np.array(level, np.int64) if len(level) > _SMALL_FRONTIER else level
+                )
+                continue
+
+            starts = indptr[frontier]
+            counts = indptr[frontier + 1] - starts
+            total = int(counts.sum())
+            if not total:
+                break
+            # Positions of the neighbours of every frontier job, concatenated.
+            offsets = np.repeat(starts - (np.cumsum(counts) - counts), counts)
+            frontier = neighbours[offsets + np.arange(total)]
+            frontier = np.unique(frontier[~reached[frontier]])
+            reached[frontier] = True
+        result = np.flatnonzero(reached).astype(np.int32)
+
+        if key is not None and result.nbytes <= _CLOSURE_CACHE_BYTES:
+            while self._closure_bytes + result.nbytes > _CLOSURE_CACHE_BYTES:
+                evicted = self._graph.pop(self._closures.popleft())
+                self._closure_bytes -= evicted.nbytes
+            self._closures.append(key)
+            self._closure_bytes += result.nbytes
+            self._graph[key] = result
+        return result
+
+    def _input_span(self, index: int) -> Tuple[int, int]:
+        """Locates the input role's job IDs within the input_ids of a job."""
+        shape = self.shapes[index]
+        cached = self._input_spans.get(id(shape))
+        if cached is None or cached[0] is not shape:
+            inputs = _role_field(
+                shape, INPUT_ROLES.get(self.stage_types[index]), "inputs"
+            )
+            start = end = 0
+            for input_list in _iter_input_lists(shape):
+                count = sum(
+                    1 for m in input_list if isinstance(m, dict) and "job_id" in m
+                )
+                if input_list is inputs:
+                    end = start + count
+                    break
+                start += count
+            else:
+                start = 0
+            # The shape is kept alongside its span so that a reused id() is detected.
+            cached = self._input_spans[id(shape)] = (shape, start, end)
+        return cached[1], cached[2]
+
+    def _columns(self) -> Tuple[List[Any], ...]:
+        return (
+            self.names,
+            self.stage_types,
+            self.params,
+            self.outputs,
+            self.shapes,
+            self.input_ids,
+        )
+
+    def _get_pools(self) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        if self._pools is None:
+            params_pool: Dict[str, Any] = {}
+            shape_pool: Dict[str, Any] = {}
+            for params in self.params:
+                if isinstance(params, dict):
+                    params_pool.setdefault(repr(params), params)
+            for shape in self.shapes:
+                shape_pool.setdefault(repr(shape), shape)
+            self._pools = (params_pool, shape_pool)
+        return self._pools
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # The deduplication pools, input spans and graph indices are rebuilt on
+        # demand.
+        state = self.__dict__.copy()
+        del state["_pools"], state["_input_spans"]
+        del state["_graph"], state["_closures"], state["_closure_bytes"]
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]):
+        self.__dict__.update(state)
+        self._pools = None
+        self._input_spans = {}
+        self._graph = {}
+        self._closures = deque()
+        self._closure_bytes = 0
+
+    def __getitem__(self, job_id: str) -> Dict[str, Any]:
+        return self.record(self._index[job_id])
+
+    def __contains__(self, job_id: object) -> bool:
+        return job_id in self._index
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.ids)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def __repr__(self) -> str:
+        return f"<JobTable size={len(self)}>"
+
+
+class JobTableView(Mapping[str, Dict[str, Any]]):
+    """A read-only mapping over a subset of a JobTable, such as a run's jobs."""
+
+    def __init__(self, table: JobTable, job_ids: Iterable[str]):
+        self._table = table
+        self._ids = tuple(sys.intern(job_id) for job_id in job_ids)
+        self._members: Optional[frozenset] = None
+
+    def __getitem__(self, job_id: str) -> Dict[str, Any]:
+        if job_id not in self:
+            raise KeyError(job_id)
+        return self._table[job_id]
+
+    def __contains__(self, job_id: object) -> bool:
+        if self._members is None:
+            self._members = frozenset(self._ids)
+        return job_id in self._members
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._ids)
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def __repr__(self) -> str:
+        return f"<JobTableView size={len(self)}>"
@@ -0,0 +1,156 @@
+import json
+from json.decoder import scanstring
+from typing import IO, Any, Callable, Dict, Optional
+
+DEFAULT_CHUNK_SIZE = 1 << 20
+DEFAULT_STREAM_THRESHOLD = 64 << 20
+
+_WHITESPACE = " \t\n\r"
+_NUMBER_TAIL = "0123456789.eE+-"
+_NUMBER_CUT = 2
+_decoder = json.JSONDecoder()
+
+
+class _Reader:
+    """A sliding window over a text stream, refilled on demand."""
+
+    def __init__(self, fp: IO[str], chunk_size: int):
+        self.fp = fp
+        self.chunk_size = chunk_size
+        self.buf = ""
+        self.pos = 0
+        self.eof = False
+
+    def fill(self) -> bool:
+        """
+        Drops consumed text and appends more input. The read size grows with the
+        pending text so that decoding a single large value stays linear.
+        """
+        if self.eof:
+            return False
+        pending = self.buf[self.pos :]
+        data = self.fp.read(max(self.chunk_size, len(pending)))
+        if not data:
+            self.eof = True
+            return False
+        self.buf = pending + data
+        self.pos = 0
+        return True
+
+    def peek(self) -> str:
+        """Skips whitespace and returns the next character, or '' at end of input."""
+        while True:
+            buf, pos = self.buf, self.pos
+            while pos < len(buf) and buf[pos] in _WHITESPACE:
+                pos += 1
+            self.pos = pos
+            if pos < len(buf):
+                return buf[pos]
+            if not self.fill():
+                return ""
+
+    def error(self, msg: str) -> json.JSONDecodeError:
+        return json.JSONDecodeError(msg, self.buf, self.pos)
+
+    def expect(self, char: str):
+        if self.peek() != char:
+            raise self.error(f"Expecting '{char}'")
+        self.pos += 1
+
+    def string(self) -> str:
+        self.expect('"')
+        while True:
+            try:
+                value, self.pos = scanstring(self.buf, self.pos)
+                return value
+            except json.JSONDecodeError:
+                if not self.fill():
+                    raise
+
+    def value(self) -> Any:
+        if not self.peek():
+            raise self.error("Expecting value")
+        while True:
+            try:
+                value, end = _decoder.raw_decode(self.buf, self.pos)
+            except json.JSONDecodeError:
+                if self.fill():
+                    continue
+                raise
+            # A number cut at the window edge decodes as a shorter one, followed
+            # by at most the start of its fraction or exponent ('1.', '2e-'), so
+            # a value followed only by such characters is decoded again. Only
+            # the last few characters of the window are looked at.
+            if (
+                len(self.buf) - end <= _NUMBER_CUT
+                and not self.buf[end:].strip(_NUMBER_TAIL)
+                and self.fill()
+            ):
+                continue
+            self.pos = end
+            return value
+
+    def next_member(self) -> bool:
+        """Consumes the separator after an object member; False at the closing brace."""
+        char = self.peek()
+        self.pos += 1
+        if char == ",":
+            return True
+        if char == "}":
+            return False
+        self.pos -= 1
+        raise self.error("Expecting ',' delimiter")
+
+
+def _read_object(
+    reader: _Reader,
+    stream_key: Optional[str],
+    value_hook: Optional[Callable[[str, Any], Any]],
+) -> Dict[str, Any]:
+    reader.expect("{")
+    result: Dict[str, Any] = {}
+    if reader.peek() == "}":
+        reader.pos += 1
+        return result
+
+    while True:
+        key = reader.string()
+        reader.expect(":")
+        if stream_key is not None and key == stream_key and reader.peek() == "{":
+            result[key] = _read_object(reader, None, value_hook)
+        elif stream_key is None and value_hook is not None:
+            result[key] = value_hook(key, reader.value())
+        else:
+            result[key] = reader.value()
+        if not reader.next_member():
+            return result
+
+
+def load(
+    fp: IO[str],
+    stream_key: str = "jobs",
+    value_hook: Optional[Callable[[str, Any], Any]] = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> Any:
+    """
+    Decodes a JSON document from a text stream without reading it into memory
+    as a whole. The top-level object is decoded member by member, and the object
+    stored under 'stream_key' (the jobs of a run metadata file) entry by entry,
+    so only one entry and a chunk of input text are held at any time on top of
+    the decoded result.
+
+    Args:
+        fp: A text file object.
+        stream_key: Top-level key whose object value is decoded entry by entry.
+        value_hook: Optional callable applied to each (key, value) entry of the
+            streamed object; its return value is stored instead of the entry.
+        chunk_size: Number of characters read from the stream at a time.
+    """
+    reader = _Reader(fp, chunk_size)
+    if reader.peek() == "{":
+        document = _read_object(reader, stream_key, value_hook)
+    else:
+        document = reader.value()
+    if reader.peek():
+        raise reader.error("Extra data")
+    return document
@@ -1,15 +1,24 @@
-import json
+import gc
 import logging
+import operator
 import sys
 from abc import ABC, abstractmethod
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from functools import partial
+from itertools import islice, repeat
 from pathlib import Path
 from typing import (
+    TYPE_CHECKING,
     Any,
     Callable,
     Dict,
+    Hashable,
     Iterable,
     Iterator,
     List,
+    Mapping,
     Optional,
     Sequence,
     Set,
@@ -18,10 +27,100 @@ from typing import (
     overload,
 )
 
+import numpy as np
 import pandas as pd
 
+from . import jsonstream
+from .codec import JSONCodec, get_codec
+from .jobtable import JobGraph, JobTable
+from .params import LayeredParams
+from .query import (
+    COLUMN_FIELDS,
+    PARAM_FIELDS,
+    Column,
+    Lookup,
+    ParamIndex,
+    PrefixIndex,
+    Q,
+    bitmap_from_indices,
+    bitmap_indices,
+    column_mask,
+    factorize,
+    freeze,
+    is_columnar,
+)
+from .snapshot import file_signature, read_snapshot, snapshot_file, write_snapshot
+
+if TYPE_CHECKING:
+    from .watch import LabWatcher
+
 logger = logging.getLogger(__name__)
 
+_UNSET = object()
+
+
+@contextmanager
+def _gc_paused():
+    """
+    Pauses the cyclic garbage collector, which passes allocating an object per
+    job would otherwise trigger over and over on large labs.
+    """
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
+
+
+class AmbiguousJobIDError(KeyError):
+    """Raised when a short job ID matches the IDs of several jobs."""
+
+    def __init__(self, prefix: str, job_ids: List[str]):
+        self.prefix = prefix
+        self.job_ids = job_ids
+        shown = ", ".join(job_ids[:5]) + (", ..." if len(job_ids) > 5 else "")
+        super().__init__(
+            f"Job ID prefix '{prefix}' is ambiguous: it matches {len(job_ids)} "
+            f"jobs ({shown})."
+        )
+
+    def __str__(self) -> str:
+        return self.args[0]
+
+
+class CircularDependencyError(RecursionError):
+    """Raised when jobs depend on each other in a cycle."""
+
+    def __init__(self, cycle: List[str]):
+        self.cycle = cycle
+        super().__init__(f"Circular dependency detected: {' -> '.join(cycle)}")
+
+
+def _read_json_file(
+    path: Path,
+    stream_threshold: Optional[int] = None,
+    codec: Optional[JSONCodec] = None,
+    job_table: Optional[JobTable] = None,
+) -> Tuple[Optional[Tuple[int, int]], Any]:
+    """
+    Stats and decodes a JSON file, returning its (size, mtime_ns) signature and
+    content, or (None, None) if the file does not exist. Files of at least
+    stream_threshold bytes are decoded incrementally, others through the codec.
+    Streamed jobs are compacted by job_table as they are decoded.
+    """
+    if not path.is_file():
+        return None, None
+    signature = file_signature(path)
+    if stream_threshold is not None and signature[0] >= stream_threshold:
+        logger.debug(f"Streaming large metadata file {path}")
+        hook = job_table.pack if job_table is not None else None
+        with open(path, "r") as f:
+            return signature, jsonstream.load(f, value_hook=hook)
+    with open(path, "rb") as f:
+        return signature, (codec or get_codec()).load(f)
+
 
 class ArtifactResolver(ABC):
     """
@@ -73,12 +172,22 @@ class JobView:
     """
     A read-only view of a single job's metadata, effective parameters, and capabilities
     to locate its physical output artifacts using a Resolver.
+
+    Views are flyweights over the experiment's JobTable: they hold the job's index
+    and read the shared metadata in place, without copying it. Fields derived from
+    the stage type, the executable path and input mappings, are computed on first
+    access and kept.
     """
 
+    __slots__ = ("_id", "_exp", "_table", "_index", "_executable_path", "_inputs")
+
     def __init__(self, job_id: str, experiment: "Experiment"):
         self._id = job_id
         self._exp = experiment
-        self._data = self._exp._get_complete_job_data(self._id)
+        self._table: JobTable = self._exp._metadata["jobs"]
+        self._index = self._table.index_of(job_id)
+        self._executable_path: Any = _UNSET
+        self._inputs: Optional[List[Dict[str, Any]]] = None
 
     @property
     def id(self) -> str:
@@ -86,54 +195,71 @@ class JobView:
 
     @property
     def name(self) -> str:
-        return self._data.get("name", self._id)
+        return self._table.names[self._index]
 
     @property
     def stage_type(self) -> str:
-        return self._data.get("stage_type", "simple")
+        return self._table.stage_types[self._index]
 
     @property
     def executable_path(self) -> str | None:
-        if self.stage_type == "simple":
-            return self._data.get("executables", {}).get("main", {}).get("path")
-        return None
+        if self._executable_path is _UNSET:
+            self._executable_path = (
+                self._table.role_field(self._index, "main", "path")
+                if self.stage_type == "simple"
+                else None
+            )
+        return self._executable_path
 
     @property
     def input_mappings(self) -> List[Dict[str, Any]]:
-        if self.stage_type == "simple":
-            return self._data.get("executables", {}).get("main", {}).get("inputs", [])
-        elif self.stage_type == "scatter-gather":
-            return (
-                self._data.get("executables", {}).get("scatter", {}).get("inputs", [])
-            )
-        return []
+        if self._inputs is None:
+            self._inputs = self._table.input_mappings(self._index)
+        return self._inputs
 
     @property
     def outputs(self) -> Dict[str, str]:
-        if self.stage_type == "simple":
-            return self._data.get("executables", {}).get("main", {}).get("outputs", {})
-        elif self.stage_type == "scatter-gather":
-            return (
-                self._data.get("executables", {}).get("gather", {}).get("outputs", {})
-            )
-        return {}
+        outputs = self._table.outputs[self._index]
+        # Empty dicts are shared between jobs, so each caller gets its own.
+        return {} if isinstance(outputs, dict) and not outputs else outputs
 
     @property
     def params(self) -> Dict[str, Any]:
-        return self._data.get("params", {})
+        params = self._table.params[self._index]
+        return {} if isinstance(params, dict) and not params else params
 
     @property
-    def effective_params(self) -> Dict[str, Any]:
-        return self._data.get("effective_params", {})
+    def effective_params(self) -> Mapping[str, Any]:
+        return self._exp._job_effective_params(self._id)
 
     @property
     def dependencies(self) -> "JobCollection":
-        parent_ids = set()
-        for mapping in self.input_mappings:
-            if pid := mapping.get("job_id"):
-                if pid != "self":
-                    parent_ids.add(pid)
-        return JobCollection(self._exp, parent_ids)
+        table = self._table
+        if self._exp._lazy:
+            for dep_id in table.input_job_ids(self._index):
+                if dep_id and dep_id != "self":
+                    self._exp._ensure_job_loaded(dep_id)
+        return JobCollection._from_indices(self._exp, table.parent_indices(self._index))
+
+    @property
+    def dependents(self) -> "JobCollection":
+        """The jobs taking this job as an input, in load order."""
+        self._exp._ensure_all_runs_loaded()
+        table = self._table
+        return JobCollection._from_indices(self._exp, table.child_indices(self._index))
+
+    def consumers(self, output_key: str) -> "JobCollection":
+        """Returns the jobs whose input mappings read the given output of this job."""
+        if output_key not in self.outputs:
+            raise KeyError(
+                f"Output key '{output_key}' not found in job '{self.id}'. "
+                f"Available keys: {list(self.outputs.keys())}"
+            )
+        self._exp._ensure_all_runs_loaded()
+        table = self._table
+        return JobCollection._from_indices(
+            self._exp, table.consumer_indices(self._index, output_key)
+        )
 
     def get_output_path(self, output_key: str) -> Path:
         template = self.outputs.get(output_key)
@@ -160,8 +286,11 @@ class JobView:
         return pd.read_csv(path, **kwargs)
 
     def __getattr__(self, key: str) -> Any:
-        if key in self._data:
-            return self._data[key]
+        # Slots not set yet, as while unpickling, must not recurse into the record.
+        if key not in JobView.__slots__ and not key.startswith("__"):
+            value = self._table.field(self._index, key, _UNSET)
+            if value is not _UNSET:
+                return value
         raise AttributeError(f"'JobView' object has no attribute or data key '{key}'")
 
     def __repr__(self) -> str:
@@ -169,54 +298,265 @@ class JobView:
 
 
 class JobCollection(Sequence[JobView]):
+    """
+    An ordered collection of the jobs of an Experiment.
+
+    Jobs are held as an int32 array of indices into the experiment's job table,
+    so slicing a collection returns a view of its array and filtering masks it,
+    without copying job IDs.
+
+    Collections returned by filter() are lazy: their conditions are evaluated
+    when jobs are first accessed, in a single pass for chained filter() calls.
+    first(), exists(), indexing and slicing stop as soon as they have the jobs
+    they need; other accesses evaluate the whole collection once.
+
+    Collections of the same experiment combine with '|', '&' and '-' through
+    bitmaps over job indices, computed once per collection. The results are
+    ordered by job index, that is in load order.
+    """
+
     def __init__(self, experiment: "Experiment", job_ids: Iterable[str]):
         self._exp = experiment
-        self._job_ids = list(job_ids)
+        self._table: JobTable = experiment._metadata["jobs"]
+        self._indices: Optional[np.ndarray] = np.fromiter(
+            map(self._table.index_of, job_ids), np.int32
+        )
+        self._query: Optional[Q] = None
+        self._predicates: List[Callable[[JobView], bool]] = []
+        self._plan: Optional[Tuple[np.ndarray, np.ndarray, Dict[int, Any]]] = None
+        self._bitmap: Optional[int] = None
+
+    @classmethod
+    def _from_indices(
+        cls,
+        experiment: "Experiment",
+        indices: np.ndarray,
+        query: Optional[Q] = None,
+        predicates: Sequence[Callable[[JobView], bool]] = (),
+    ) -> "JobCollection":
+        """
+        Returns the collection of the jobs at the given indices of the current
+        job table, narrowed down by query and predicates if given.
+        """
+        collection = cls(experiment, ())
+        collection._indices = np.asarray(indices, np.int32)
+        collection._query = query
+        collection._predicates = list(predicates)
+        return collection
+
+    @classmethod
+    def _from_bitmap(cls, experiment: "Experiment", bitmap: int) -> "JobCollection":
+        collection = cls(experiment, ())
+        collection._indices = None
+        collection._bitmap = bitmap
+        return collection
+
+    @property
+    def _job_ids(self) -> List[str]:
+        """The IDs of the jobs of the collection, in order."""
+        ids = self._table.ids
+        return [ids[index] for index in self._evaluate().tolist()]
+
+    def _source(self) -> np.ndarray:
+        """
+        Returns the job indices the pending conditions apply to, moved to the
+        current job table if refresh() replaced it.
+
+        Raises:
+            KeyError: If a job was removed from the lab since.
+        """
+        if self._indices is None:
+            self._indices = bitmap_indices(self._bitmap).astype(np.int32)
+        table: JobTable = self._exp._metadata["jobs"]
+        if table is not self._table:
+            ids = self._table.ids
+            self._indices = np.fromiter(
+                (table.index_of(ids[index]) for index in self._indices.tolist()),
+                np.int32,
+                len(self._indices),
+            )
+            self._table, self._plan, self._bitmap = table, None, None
+        return self._indices
+
+    def _evaluate(self) -> np.ndarray:
+        """Returns the indices of the jobs of the collection, evaluating it once."""
+        indices = self._source()
+        if not self._is_lazy():
+            return indices
+
+        get_job, ids = self._exp.get_job, self._table.ids
+        if self._query is None:
+            keep = np.ones(len(indices), bool)
+        else:
+            lower, upper, masks = self._get_plan()
+            keep = lower[indices]
+            undecided = np.flatnonzero(upper[indices] & ~keep)
+            for position, index in zip(undecided.tolist(), indices[undecided].tolist()):
+                keep[position] = self._query.matches(get_job(ids[index]), index, masks)
+        if self._predicates:
+            kept = np.flatnonzero(keep)
+            for position, index in zip(kept.tolist(), indices[kept].tolist()):
+                job = get_job(ids[index])
+                keep[position] = all(check(job) for check in self._predicates)
+
+        self._indices = indices[keep]
+        self._query, self._predicates, self._plan = None, [], None
+        return self._indices
+
+    def _get_plan(self) -> Tuple[np.ndarray, np.ndarray, Dict[int, Any]]:
+        """
+        Returns masks over job indices of the jobs that match the query for
+        sure and of those that may match it, with the lookup masks they use.
+        """
+        if self._plan is None:
+            masks = {
+                id(lookup): (
+                    self._exp._lookup_mask(lookup) if is_columnar(lookup) else None
+                )
+                for lookup in self._query.lookups()
+            }
+            lower, upper = self._query.bounds(masks, len(self._table))
+            self._plan = (lower, upper, masks)
+        return self._plan
+
+    def _iter_indices(self) -> Iterator[int]:
+        """Yields the indices of the jobs matching the pending conditions."""
+        indices = self._source()
+        get_job, ids = self._exp.get_job, self._table.ids
+        query, predicates = self._query, self._predicates
+        if query is None:
+            candidates, matched = indices.tolist(), repeat(True)
+        else:
+            lower, upper, masks = self._get_plan()
+            indices = indices[upper[indices]]
+            candidates, matched = indices.tolist(), lower[indices].tolist()
+
+        for index, is_matched in zip(candidates, matched):
+            if not is_matched and not query.matches(get_job(ids[index]), index, masks):
+                continue
+            if predicates and not all(
+                check(get_job(ids[index])) for check in predicates
+            ):
+                continue
+            yield index
+
+    def _bits(self) -> int:
+        """Returns the bitmap of the collection over the current job table."""
+        indices = self._evaluate()
+        if self._bitmap is None:
+            self._bitmap = bitmap_from_indices(indices, len(self._table))
+        return self._bitmap
+
+    def _combine(
+        self, other: "JobCollection", combine: Callable[[int, int], int]
+    ) -> "JobCollection":
+        if not isinstance(other, JobCollection):
+            return NotImplemented
+        if other._exp is not self._exp:
+            raise ValueError("Cannot combine jobs of different experiments.")
+        return JobCollection._from_bitmap(
+            self._exp, combine(self._bits(), other._bits())
+        )
+
+    def __or__(self, other: "JobCollection") -> "JobCollection":
+        return self._combine(other, operator.or_)
+
+    def __and__(self, other: "JobCollection") -> "JobCollection":
+        return self._combine(other, operator.and_)
+
+    def __sub__(self, other: "JobCollection") -> "JobCollection":
+        return self._combine(other, lambda left, right: left & ~right)
+
+    def isin(self, jobs: Iterable[Union[str, JobView]]) -> np.ndarray:
+        """
+        Returns a boolean array telling, for each job of the collection in
+        order, whether it belongs to jobs (a JobCollection, or job IDs or
+        JobViews).
+
+        Raises:
+            ValueError: If jobs is a collection of another experiment.
+        """
+        indices = self._evaluate()
+        if isinstance(jobs, JobCollection) and jobs._exp is not self._exp:
+            raise ValueError("Cannot compare jobs of different experiments.")
+        if not isinstance(jobs, JobCollection):
+            job_ids = (job if isinstance(job, str) else job.id for job in jobs)
+            jobs = JobCollection(
+                self._exp, (job_id for job_id in job_ids if job_id in self._table)
+            )
+        members = np.zeros(len(self._table), bool)
+        members[bitmap_indices(jobs._bits())] = True
+        return members[indices]
+
+    def __contains__(self, job: object) -> bool:
+        job_id = job.id if isinstance(job, JobView) else job
+        if not isinstance(job_id, str):
+            return False
+        bitmap = self._bits()
+        if job_id not in self._table:
+            return False
+        return bool(bitmap >> self._table.index_of(job_id) & 1)
+
+    def _is_lazy(self) -> bool:
+        return self._query is not None or bool(self._predicates)
 
     def filter(
-        self, predicate: Optional[Callable[[JobView], bool]] = None, **kwargs
+        self,
+        *conditions: Union[Q, Callable[[JobView], bool]],
+        predicate: Optional[Callable[[JobView], bool]] = None,
+        **kwargs,
     ) -> "JobCollection":
-        def match(job: JobView) -> bool:
-            if predicate and not predicate(job):
-                return False
+        """
+        Returns the jobs matching all the given conditions, in order.
 
-            for key, required_value in kwargs.items():
-                if "__" in key:
-                    attr, op = key.split("__", 1)
-                    if not hasattr(job, attr):
-                        return False
-                    actual_value = getattr(job, attr)
-
-                    if op == "startswith":
-                        if not str(actual_value).startswith(required_value):
-                            return False
-                    elif op == "endswith":
-                        if not str(actual_value).endswith(required_value):
-                            return False
-                    elif op == "contains":
-                        if required_value not in str(actual_value):
-                            return False
-                    else:
-                        logger.warning(f"Unknown filter operator: __{op}")
-                        if actual_value != required_value:
-                            return False
-                else:
-                    if not hasattr(job, key) or getattr(job, key) != required_value:
-                        return False
+        Conditions are Q objects, predicates called with each JobView, and
+        keyword lookups of the form '<field>__<operator>=<value>', or
+        '<field>__<key>__<operator>=<value>' on 'params' and 'effective_params',
+        with the operator defaulting to 'exact'.
 
-            return True
+        Lookups on parameters and on 'id', 'name' and 'stage_type' are evaluated
+        first, for all jobs at once, from columns and indexes kept by the
+        experiment, and combined as job masks. Lookups on other fields and
+        predicates only run on the jobs these leave.
 
-        filtered_ids = [
-            job_id
-            for job_id in self._job_ids
-            if (job := self._exp.get_job(job_id)) and match(job)
-        ]
-        return JobCollection(self._exp, filtered_ids)
+        Raises:
+            ValueError: If a lookup names an unknown operator.
+        """
+        predicates = list(self._predicates)
+        if predicate is not None:
+            predicates.append(predicate)
+        queries = [] if self._query is None else [self._query]
+        for condition in conditions:
+            if isinstance(condition, Q):
+                queries.append(condition)
+            elif callable(condition):
+                predicates.append(condition)
+            else:
+                raise TypeError(
+                    f"Filter conditions must be Q objects or callables, "
+                    f"got {condition!r}."
+                )
+        query = Q(*queries, **kwargs)
+        return JobCollection._from_indices(
+            self._exp, self._source(), query if query.children else None, predicates
+        )
+
+    def first(self) -> Optional[JobView]:
+        """Returns the first job of the collection, or None if it is empty."""
+        index = next(self._iter_indices(), None)
+        return None if index is None else self._exp.get_job(self._table.ids[index])
+
+    def exists(self) -> bool:
+        """Whether the collection holds any job."""
+        return next(self._iter_indices(), None) is not None
+
+    def count(self) -> int:  # type: ignore[override]
+        """Returns the number of jobs in the collection."""
+        return len(self._evaluate())
 
     def to_dataframe(self) -> pd.DataFrame:
         data = []
-        for job_id in self._job_ids:
-            job = self._exp.get_job(job_id)
+        for job in self:
             row = {"job_id": job.id, "name": job.name}
             row.update(job.effective_params)
             data.append(row)
@@ -231,11 +571,23 @@ class JobCollection(Sequence[JobView]):
         return df
 
     def __iter__(self) -> Iterator[JobView]:
-        for job_id in self._job_ids:
-            yield self._exp.get_job(job_id)
+        indices = self._source()
+        get_job, ids = self._exp.get_job, self._table.ids
+        if not self._is_lazy():
+            for index in indices.tolist():
+                yield get_job(ids[index])
+            return
+
+        indices = []
+        for index in self._iter_indices():
+            indices.append(index)
+            yield get_job(ids[index])
+        if self._is_lazy():
+            self._indices = np.array(indices, np.int32)
+            self._query, self._predicates, self._plan = None, [], None
 
     def __len__(self) -> int:
-        return len(self._job_ids)
+        return self.count()
 
     @overload
     def __getitem__(self, index: int) -> JobView: ...
@@ -245,8 +597,92 @@ class JobCollection(Sequence[JobView]):
 
     def __getitem__(self, index: Union[int, slice]) -> Union[JobView, "JobCollection"]:
         if isinstance(index, slice):
-            return JobCollection(self._exp, self._job_ids[index])
-        return self._exp.get_job(self._job_ids[index])
+            start, stop, step = index.start or 0, index.stop, index.step
+            if step == 0:
+                raise ValueError("slice step cannot be zero")
+            step = 1 if step is None else step
+            lazy_slice = start >= 0 and stop is not None and stop >= 0 and step > 0
+            if self._is_lazy() and lazy_slice:
+                # Only the jobs up to the end of the slice are evaluated.
+                indices = islice(self._iter_indices(), start, stop, step)
+                return JobCollection._from_indices(
+                    self._exp, np.fromiter(indices, np.int32)
+                )
+            return JobCollection._from_indices(self._exp, self._evaluate()[index])
+
+        if self._is_lazy() and index >= 0:
+            found = next(islice(self._iter_indices(), index, None), None)
+            if found is None:
+                raise IndexError("JobCollection index out of range")
+            return self._exp.get_job(self._table.ids[found])
+        found = self._evaluate()[index]
+        return self._exp.get_job(self._table.ids[found])
+
+    def group_by(self, *keys: str) -> Dict[Tuple[Any, ...], "JobCollection"]:
+        """
+        Partitions the collection by the values of the given keys.
+
+        Keys are 'id', 'name', 'stage_type', 'run', or parameters given as
+        'params__<key>' or 'effective_params__<key>'. Jobs are grouped in a
+        single pass over the coded columns that filter() uses; a job without
+        the parameter, or outside any run, has the value None.
+
+        Returns:
+            A dict mapping each tuple of key values to the collection of its
+            jobs, with groups in order of first appearance and jobs in
+            collection order.
+
+        Raises:
+            ValueError: If no key, or an unknown key, is given.
+        """
+        if not keys:
+            raise ValueError("group_by() expects at least one key.")
+        indices = self._evaluate()
+        columns = [self._exp._group_column(key) for key in keys]
+        if not len(indices):
+            return {}
+
+        # Mixed radix codes of the key columns, renumbered after each column so
+        # they stay below the number of jobs. Values equal as keys, such as 1
+        # and True, share a code, and a missing value and an explicit None share
+        # the code past the last value, so that each key has a single group.
+        groups = np.zeros(len(indices), np.int64)
+        for column in columns:
+            shared: Dict[Hashable, int] = {None: len(column.values)}
+            remap = [
+                shared.setdefault(freeze(value), code)
+                for code, value in enumerate(column.values)
+            ]
+            remap.append(len(column.values))
+            codes = np.array(remap, np.int64)[column.codes[indices]]
+            mixed = groups * (len(column.values) + 1) + codes
+            _, groups = np.unique(mixed, return_inverse=True)
+        _, first, groups = np.unique(groups, return_index=True, return_inverse=True)
+        order = np.argsort(groups, kind="stable")
+        members = np.split(order, np.cumsum(np.bincount(groups))[:-1])
+
+        grouped = {}
+        for group in np.argsort(first).tolist():
+            rows = members[group]
+            job = indices[rows[0]]
+            key = tuple(
+                (
+                    None
+                    if column.codes[job] < 0
+                    else freeze(column.values[column.codes[job]])
+                )
+                for column in columns
+            )
+            grouped[key] = JobCollection._from_indices(self._exp, indices[rows])
+        return grouped
+
+    def ancestors(self) -> "JobCollection":
+        """Returns the jobs that any job of the collection depends on."""
+        return self._exp.ancestors(self._job_ids)
+
+    def descendants(self) -> "JobCollection":
+        """Returns the jobs that depend on any job of the collection."""
+        return self._exp.descendants(self._job_ids)
 
     def __repr__(self) -> str:
         return f"<JobCollection size={len(self)}>"
@@ -259,29 +695,78 @@ class Experiment:
         self,
         lab_path: Union[str, Path, None] = None,
         resolver: Optional[ArtifactResolver] = None,
+        snapshot: Union[bool, str, Path] = False,
+        load_workers: Optional[int] = None,
+        lazy: bool = False,
+        stream_threshold: Optional[int] = jsonstream.DEFAULT_STREAM_THRESHOLD,
+        json_backend: Optional[str] = None,
+        lazy_params: bool = False,
         _preloaded_metadata: Optional[Dict[str, Any]] = None,
     ):
+        """
+        Args:
+            lab_path: Path to the lab directory.
+            resolver: Strategy used to locate job outputs. Defaults to a
+                LocalCacheResolver on './.repx-cache'.
+            snapshot: Opt-in on-disk snapshot of the loaded metadata and effective
+                parameters. True stores it in the per-user cache directory, a path
+                selects another directory. The snapshot is reused as long as every
+                metadata file it was built from keeps its size and mtime.
+            load_workers: Number of threads used to read and decode run metadata
+                files concurrently. Runs are still merged in the order listed by
+                the root metadata. Defaults to sequential loading.
+            lazy: Only read the root metadata at construction. Run metadata files
+                are loaded on first access, including the runs holding the
+                upstream jobs of a job whose effective parameters are needed.
+                A job defined again by a run loaded later takes its new record,
+                and cached results for it and its descendants are dropped.
+                Implies lazy_params. A valid snapshot is still used if present,
+                but lazy loading never writes one.
+            stream_threshold: Size in bytes from which metadata files are decoded
+                incrementally, one job at a time, instead of as a whole document.
+                None always decodes whole documents.
+            json_backend: JSON backend used to decode metadata ('json', 'orjson'
+                or 'auto' for the fastest installed one). Defaults to the
+                REPX_JSON_BACKEND environment variable, then to 'json'.
+            lazy_params: Compute the effective parameters of a job, and of the
+                jobs upstream of it, when they are first needed rather than for
+                every job at construction. Results only differ from eager
+                computation for jobs downstream of an empty job record.
+        """
         self.resolver = resolver or LocalCacheResolver()
+        self._load_workers = load_workers
+        self._stream_threshold = stream_threshold
+        self._codec = get_codec(json_backend)
+        self._lazy = False
+        self._lazy_params = lazy_params or lazy
+        self._pending_runs: deque = deque()
+        self._job_view_cache: Dict[str, JobView] = {}
+        self._effective_params_cache: Dict[str, Mapping[str, Any]] = {}
+        self._param_indexes: Dict[str, ParamIndex] = {}
+        self._field_columns: Dict[str, Column] = {}
+        self._prefix_indexes: Dict[str, PrefixIndex] = {}
+        self._job_to_run_map: Dict[str, str] = {}
+        self._source_files: Dict[str, Optional[Tuple[int, int]]] = {}
+        self._run_paths: Dict[str, Optional[str]] = {}
+        self._manifest_path: Optional[Path] = None
+        self._root_metadata_path: Optional[Path] = None
+        self._snapshot_path: Optional[Path] = None
 
         if _preloaded_metadata:
             self.path = Path(".")
-            self._metadata = _preloaded_metadata
+            self._adopt_metadata(_preloaded_metadata)
+            self._effective_params_cache = (
+                {} if self._lazy_params else self._calculate_all_effective_params()
+            )
+            self._index_runs()
         elif lab_path:
             self.path = Path(lab_path).resolve()
-            self._load_lab_manifest()
+            self._load_lab(snapshot, lazy)
         else:
             raise ValueError(
                 "Either 'lab_path' or '_preloaded_metadata' must be provided."
             )
 
-        self._job_view_cache: Dict[str, JobView] = {}
-        self._effective_params_cache = self._calculate_all_effective_params()
-
-        self._job_to_run_map: Dict[str, str] = {}
-        for run_name, run_data in self.runs().items():
-            for job_id in run_data.get("jobs", []):
-                self._job_to_run_map[job_id] = run_name
-
     @classmethod
     def from_run_metadata(
         cls, metadata_path: Union[str, Path], store_base: Union[str, Path]
@@ -299,8 +784,7 @@ class Experiment:
         if not meta_path.exists():
             raise FileNotFoundError(f"Metadata file not found: {meta_path}")
 
-        with open(meta_path, "r") as f:
-            run_data = json.load(f)
+        _, run_data = _read_json_file(meta_path, jsonstream.DEFAULT_STREAM_THRESHOLD)
 
         if run_data.get("type") != "run":
             raise ValueError(
@@ -327,8 +811,65 @@ class Experiment:
             _preloaded_metadata=synthetic_metadata,
         )
 
-    def _load_lab_manifest(self):
-        """Internal method to discover and load metadata from a Lab directory."""
+    def _load_lab(self, snapshot: Union[bool, str, Path], lazy: bool = False):
+        """Loads the lab metadata and effective parameters, using a snapshot if allowed."""
+        manifest_path = self._find_lab_manifest()
+
+        snapshot_path = None
+        if snapshot:
+            snapshot_dir = None if snapshot is True else snapshot
+            snapshot_path = snapshot_file(self.path, snapshot_dir)
+            state = read_snapshot(snapshot_path, self.path, manifest_path)
+            if state is not None:
+                logger.debug(f"Loaded metadata snapshot from {snapshot_path}")
+                self._source_files = state["files"]
+                self._metadata = state["metadata"]
+                self._effective_params_cache = state["effective_params"]
+                self._run_paths = state["run_paths"]
+                self._manifest_path = manifest_path
+                self._root_metadata_path = state["root_metadata_path"]
+                if not lazy:
+                    self._snapshot_path = snapshot_path
+                self._index_runs()
+                if not self._lazy_params:
+                    # Snapshots written in lazy_params mode may be incomplete.
+                    self._calculate_effective_params(
+                        self._metadata["jobs"], self._effective_params_cache
+                    )
+                return
+
+        if lazy:
+            self._lazy = True
+            self._effective_params_cache = {}
+            self._load_lab_manifest(manifest_path, lazy=True)
+            return
+
+        self._load_lab_manifest(manifest_path)
+        self._effective_params_cache = (
+            {} if self._lazy_params else self._calculate_all_effective_params()
+        )
+
+        if snapshot_path:
+            self._snapshot_path = snapshot_path
+            self._write_snapshot()
+
+    def _write_snapshot(self):
+        write_snapshot(
+            self._snapshot_path,
+            self.path,
+            self._manifest_path,
+            self._source_files,
+            {
+                "files": self._source_files,
+                "metadata": self._metadata,
+                "effective_params": self._effective_params_cache,
+                "run_paths": self._run_paths,
+                "root_metadata_path": self._root_metadata_path,
+            },
+        )
+
+    def _find_lab_manifest(self) -> Path:
+        """Internal method to locate the lab manifest inside the lab directory."""
         lab_dir = self.path / "lab"
         if not lab_dir.exists():
             lab_dir = self.path
@@ -343,9 +884,65 @@ class Experiment:
                 f"Could not find a lab manifest JSON file in {lab_dir}"
             )
 
-        manifest_path = manifest_candidates[0]
-        with open(manifest_path, "r") as f:
-            lab_manifest = json.load(f)
+        return manifest_candidates[0]
+
+    def _read_metadata_file(
+        self, path: Path, job_table: Optional[JobTable] = None
+    ) -> Dict[str, Any]:
+        """Decodes a metadata file, recording its signature for snapshot validation."""
+        signature, data = _read_json_file(
+            path, self._stream_threshold, self._codec, job_table
+        )
+        self._source_files[str(path)] = signature
+        return data
+
+    def _read_run_metadata_files(
+        self, paths: List[Path]
+    ) -> Iterator[Tuple[Path, Optional[Dict[str, Any]]]]:
+        """
+        Yields (path, run_data) pairs in the given order, run_data being None for
+        missing files. With load_workers set, files are read by a thread pool so
+        that per-file latency overlaps.
+        """
+        read = partial(
+            _read_json_file,
+            stream_threshold=self._stream_threshold,
+            codec=self._codec,
+            job_table=self._metadata["jobs"],
+        )
+        if self._load_workers and self._load_workers > 1 and len(paths) > 1:
+            with ThreadPoolExecutor(max_workers=self._load_workers) as pool:
+                results = list(pool.map(read, paths))
+        else:
+            results = map(read, paths)
+
+        for path, (signature, data) in zip(paths, results):
+            self._source_files[str(path)] = signature
+            yield path, data
+
+    def _load_lab_manifest(self, manifest_path: Path, lazy: bool = False):
+        """
+        Internal method to discover and load metadata from a Lab directory.
+        In lazy mode, run metadata files are only queued for loading.
+        """
+        self._metadata = {
+            "root": self._read_lab_root(manifest_path),
+            "runs": {},
+            "jobs": JobTable(),
+        }
+
+        run_paths = self._listed_run_paths()
+        if lazy:
+            self._pending_runs.extend(run_paths)
+            return
+
+        for run_metadata_path, run_data in self._read_run_metadata_files(run_paths):
+            self._add_run(run_metadata_path, run_data)
+        self._metadata["jobs"].release_pools()
+
+    def _read_lab_root(self, manifest_path: Path) -> Dict[str, Any]:
+        """Reads the lab manifest and the root metadata file it points to."""
+        lab_manifest = self._read_metadata_file(manifest_path)
 
         top_metadata_rel_path = lab_manifest.get("metadata")
         if not top_metadata_rel_path:
@@ -357,115 +954,652 @@ class Experiment:
         if not root_metadata_path.is_file():
             raise FileNotFoundError(f"Root metadata not found at {root_metadata_path}")
 
-        with open(root_metadata_path, "r") as f:
-            root_metadata = json.load(f)
-
-        all_runs_data = {}
-        all_jobs_data = {}
-
-        for run_rel_path in root_metadata.get("runs", []):
-            run_metadata_path = self.path / run_rel_path
-            if not run_metadata_path.is_file():
-                logger.warning(
-                    f"Could not find metadata for run at {run_metadata_path}"
-                )
-                continue
-
-            with open(run_metadata_path, "r") as f:
-                run_data = json.load(f)
-
+        root_metadata = self._read_metadata_file(root_metadata_path)
+        self._manifest_path = manifest_path
+        self._root_metadata_path = root_metadata_path
+        return root_metadata
+
+    def _listed_run_paths(self) -> List[Path]:
+        return [self.path / rel for rel in self._metadata["root"].get("runs", [])]
+
+    def _check_run(
+        self, run_metadata_path: Path, run_data: Optional[Dict[str, Any]]
+    ) -> Optional[str]:
+        """Returns the name of a decoded run, or None if it cannot be used."""
+        run_name = None
+        if run_data is None:
+            logger.warning(f"Could not find metadata for run at {run_metadata_path}")
+        else:
             run_name = run_data.get("name")
             if not run_name:
                 logger.warning(
                     f"Run metadata at {run_metadata_path} is missing 'name' field."
                 )
+        # Unusable runs are recorded too, so that refresh() picks up their fixes.
+        self._run_paths[str(run_metadata_path)] = run_name or None
+        return run_name or None
+
+    def _add_run(self, run_metadata_path: Path, run_data: Optional[Dict[str, Any]]):
+        """Merges a decoded run metadata file; later runs win for shared job IDs."""
+        run_name = self._check_run(run_metadata_path, run_data)
+        if run_name is None:
+            return
+
+        run_jobs = run_data.get("jobs", {})
+        job_table: JobTable = self._metadata["jobs"]
+        # In lazy mode, jobs may already have been used when a later run
+        # redefines them, or adds a job that others were waiting for.
+        replaced = {}
+        waited = set()
+        for job_id in run_jobs:
+            if job_id in job_table:
+                replaced[job_id] = job_table.packed(job_table.index_of(job_id))
+            elif job_table.waiting_for(job_id):
+                waited.add(job_id)
+        job_table.update(run_jobs)
+        run_data["jobs"] = job_table.view(run_jobs)
+        self._metadata["runs"][run_name] = run_data
+        for job_id in run_data["jobs"]:
+            self._job_to_run_map[job_id] = run_name
+        self._field_columns.pop("run", None)
+
+        waited.update(
+            job_id
+            for job_id, packed in replaced.items()
+            if job_table.packed(job_table.index_of(job_id)) != packed
+        )
+        affected = self._with_descendants(waited)
+        if affected:
+            self._param_indexes.clear()
+            self._field_columns.clear()
+            self._prefix_indexes.clear()
+        for job_id in affected:
+            self._effective_params_cache.pop(job_id, None)
+            self._job_view_cache.pop(job_id, None)
+
+    def _adopt_metadata(self, metadata: Dict[str, Any]):
+        """Stores externally built metadata, moving its jobs into a JobTable."""
+        job_table = metadata.get("jobs", {})
+        if not isinstance(job_table, JobTable):
+            job_table = JobTable(job_table)
+        runs = {
+            run_name: {**run_data, "jobs": job_table.view(run_data.get("jobs", {}))}
+            for run_name, run_data in metadata.get("runs", {}).items()
+        }
+        job_table.release_pools()
+        self._metadata = {**metadata, "runs": runs, "jobs": job_table}
+
+    def _index_runs(self):
+        """Builds the job -> run map for metadata that was not loaded run by run."""
+        for run_name, run_data in self._metadata.get("runs", {}).items():
+            for job_id in run_data.get("jobs", []):
+                self._job_to_run_map[job_id] = run_name
+
+    def _load_next_run(self) -> bool:
+        """Loads the next pending run in lazy mode. Returns False if none is left."""
+        if not self._pending_runs:
+            return False
+        run_metadata_path = self._pending_runs.popleft()
+        run_data = self._read_metadata_file(run_metadata_path, self._metadata["jobs"])
+        self._add_run(run_metadata_path, run_data)
+        if not self._pending_runs:
+            self._metadata["jobs"].release_pools()
+        return True
+
+    def _ensure_all_runs_loaded(self):
+        if self._pending_runs:
+            paths = list(self._pending_runs)
+            self._pending_runs.clear()
+            for run_metadata_path, run_data in self._read_run_metadata_files(paths):
+                self._add_run(run_metadata_path, run_data)
+            self._metadata["jobs"].release_pools()
+
+    def _ensure_run_loaded(self, run_name: str) -> bool:
+        while run_name not in self._metadata["runs"]:
+            if not self._load_next_run():
+                return False
+        return True
+
+    def _ensure_job_loaded(self, job_id: str) -> bool:
+        while job_id not in self._metadata["jobs"]:
+            if not self._load_next_run():
+                return False
+        return True
+
+    def _ensure_upstream_loaded(self, job_id: str):
+        """Lazy mode: loads the runs holding a job and all its upstream jobs."""
+        job_table: JobTable = self._metadata["jobs"]
+        visited: Set[str] = set()
+        stack = [job_id]
+        while stack:
+            job_id = stack.pop()
+            if job_id in visited or not self._ensure_job_loaded(job_id):
                 continue
+            visited.add(job_id)
+            stack.extend(
+                dep_id
+                for dep_id in job_table.input_job_ids(job_table.index_of(job_id))
+                if dep_id and dep_id != "self"
+            )
 
-            all_runs_data[run_name] = run_data
-            all_jobs_data.update(run_data.get("jobs", {}))
+    def _job_effective_params(self, job_id: str) -> Mapping[str, Any]:
+        """Returns a job's effective parameters, computing them on demand."""
+        if job_id not in self._effective_params_cache and self._lazy_params:
+            if self._lazy:
+                self._ensure_upstream_loaded(job_id)
+            self._calculate_effective_params([job_id], self._effective_params_cache)
+        return self._effective_params_cache.get(job_id, {})
+
+    def _calculate_effective_params(
+        self, job_ids: Iterable[str], memo: Dict[str, Dict]
+    ) -> Dict[str, Dict]:
+        """
+        Computes the effective parameters of the given jobs, and of the jobs they
+        depend on, into memo. A job depending on a job with an empty record, other
+        than through jobs already in memo, only gets its own parameters.
+        """
+        all_jobs_data = self._metadata.get("jobs", {})
+        shared_layers: Dict[int, LayeredParams] = {}
+        with _gc_paused():
+            for job_id in job_ids:
+                if job_id not in memo:
+                    try:
+                        self._resolve_effective_params(
+                            job_id, all_jobs_data, memo, shared_layers
+                        )
+                    except KeyError:
+                        memo[job_id] = LayeredParams.build(
+                            all_jobs_data.get(job_id, {}).get("params", {}), ()
+                        )
 
-        self._metadata = {
-            "root": root_metadata,
-            "runs": all_runs_data,
-            "jobs": all_jobs_data,
-        }
+        return memo
 
-    def _get_single_effective_params(
-        self, job_id: str, all_jobs_data: Dict, visiting: Set[str], memo: Dict
-    ) -> Dict[str, Any]:
-        if job_id in memo:
-            return memo[job_id]
-        if job_id in visiting:
-            raise RecursionError(f"Circular dependency detected at: {job_id}")
-
-        visiting.add(job_id)
-        job_data = all_jobs_data.get(job_id)
-        if not job_data:
-            raise KeyError(f"Job ID '{job_id}' not found in metadata.")
-
-        temp_view = JobView(job_id, self)
-        input_mappings = temp_view.input_mappings
-
-        effective_params: Dict[str, Any] = {}
-        for dep_mapping in input_mappings:
-            if dep_id := dep_mapping.get("job_id"):
-                if dep_id == "self":
+    def _resolve_effective_params(
+        self,
+        root_id: str,
+        all_jobs_data: JobTable,
+        memo: Dict[str, Dict],
+        shared_layers: Optional[Dict[int, LayeredParams]] = None,
+    ) -> LayeredParams:
+        """
+        Computes a job's effective parameters: those of its dependencies, merged
+        in input order, then its own. Dependencies are visited depth first with
+        an explicit stack, so pipelines of any depth are handled in linear time,
+        and memo is filled in post-order.
+        """
+        if root_id not in all_jobs_data:
+            raise KeyError(f"Job ID '{root_id}' not found in metadata.")
+        ids = all_jobs_data.ids
+        parents = all_jobs_data.parents
+
+        # Frames of [job index, parent indices, next parent, parent layers].
+        stack: List[List[Any]] = []
+        visiting: Dict[int, None] = {}
+        index: Optional[int] = all_jobs_data.index_of(root_id)
+        while True:
+            if index is not None:
+                if all_jobs_data.is_empty(index):
+                    raise KeyError(f"Job ID '{ids[index]}' not found in metadata.")
+                visiting[index] = None
+                stack.append([index, parents[index], 0, []])
+
+            frame = stack[-1]
+            dep_indices = frame[1]
+            index = None
+            while frame[2] < len(dep_indices):
+                dep_index = dep_indices[frame[2]]
+                frame[2] += 1
+                if dep_index < 0:
                     continue
-                if dep_id in all_jobs_data:
-                    effective_params.update(
-                        self._get_single_effective_params(
-                            dep_id, all_jobs_data, visiting, memo
-                        )
-                    )
+                dep_id = ids[dep_index]
+                if dep_id in memo:
+                    frame[3].append(memo[dep_id])
+                elif dep_index in visiting:
+                    path = [ids[i] for i in visiting]
+                    raise CircularDependencyError(path[path.index(dep_id) :] + [dep_id])
+                else:
+                    index = dep_index
+                    break
+            if index is not None:
+                continue
 
-        effective_params.update(job_data.get("params", {}))
-        visiting.remove(job_id)
-        memo[job_id] = effective_params
-        return effective_params
+            stack.pop()
+            del visiting[frame[0]]
+            effective_params = LayeredParams.build(
+                all_jobs_data.params[frame[0]], frame[3], shared_layers
+            )
+            memo[ids[frame[0]]] = effective_params
+            if not stack:
+                return effective_params
+            stack[-1][3].append(effective_params)
 
     def _calculate_all_effective_params(self) -> Dict[str, Dict]:
         all_jobs_data = self._metadata.get("jobs", {})
         if not all_jobs_data:
             return {}
 
-        memo: Dict[str, Dict] = {}
-        for job_id in all_jobs_data:
-            if job_id not in memo:
-                try:
-                    self._get_single_effective_params(
-                        job_id, all_jobs_data, set(), memo
-                    )
-                except KeyError:
-                    memo[job_id] = all_jobs_data.get(job_id, {}).get("params", {})
-
-        return memo
+        return self._calculate_effective_params(all_jobs_data, {})
 
     @property
     def effective_params(self) -> Dict[str, Dict]:
+        if self._lazy_params:
+            self._ensure_all_runs_loaded()
+            if len(self._effective_params_cache) < len(self._metadata["jobs"]):
+                self._calculate_effective_params(
+                    self._metadata["jobs"], self._effective_params_cache
+                )
         return self._effective_params_cache
 
-    def _get_complete_job_data(self, job_id: str) -> Dict[str, Any]:
-        raw_data = self._metadata.get("jobs", {}).get(job_id, {}).copy()
-        if hasattr(self, "_effective_params_cache"):
-            effective_params = self._effective_params_cache.get(job_id, {})
-            raw_data["effective_params"] = effective_params
-        return raw_data
+    def _param_index(self, field: str) -> ParamIndex:
+        """
+        Returns the inverted index of a parameter field ('params' or
+        'effective_params') over the job table, built on first use.
+        """
+        table: JobTable = self._metadata["jobs"]
+        index = self._param_indexes.get(field)
+        if index is None or index.size != len(table):
+            if field == "params":
+                mappings = table.params
+            else:
+                effective_params = self.effective_params
+                mappings = [effective_params.get(job_id, {}) for job_id in table.ids]
+            index = self._param_indexes[field] = ParamIndex(mappings)
+        return index
+
+    def _field_column(self, field: str) -> Column:
+        """
+        Returns the coded values of a JobTable column ('id', 'name', ...), or
+        of the run of each job for 'run'.
+        """
+        table: JobTable = self._metadata["jobs"]
+        column = self._field_columns.get(field)
+        if column is None or len(column.codes) != len(table):
+            if field == "run":
+                values = [self._job_to_run_map.get(job_id) for job_id in table.ids]
+            elif field == "id":
+                values = table.ids
+            else:
+                values = getattr(table, f"{field}s")
+            column = self._field_columns[field] = factorize(values)
+        return column
+
+    def _group_column(self, key: str) -> Column:
+        """
+        Returns the coded values of a group_by() key.
+
+        Raises:
+            ValueError: If the key is neither a column nor a parameter.
+        """
+        field, sep, param = key.partition("__")
+        if field in PARAM_FIELDS and sep:
+            return self._param_index(field).column(param)
+        if key not in COLUMN_FIELDS and key != "run":
+            raise ValueError(
+                f"Cannot group jobs by '{key}'. Use one of "
+                f"{', '.join(COLUMN_FIELDS)}, run, or params__<key> and "
+                f"effective_params__<key>."
+            )
+        return self._field_column(key)
+
+    def _prefix_index(self, field: str) -> PrefixIndex:
+        """Returns the prefix index of a JobTable column ('id' or 'name')."""
+        table: JobTable = self._metadata["jobs"]
+        index = self._prefix_indexes.get(field)
+        if index is None or index.size != len(table):
+            values = table.ids if field == "id" else getattr(table, f"{field}s")
+            index = self._prefix_indexes[field] = PrefixIndex(values)
+        return index
+
+    def _lookup_mask(self, lookup: Lookup) -> np.ndarray:
+        """
+        Returns a boolean mask over job indices, true for the jobs matching a
+        lookup on parameters or on a JobTable column.
+        """
+        if (
+            lookup.field in ("id", "name")
+            and lookup.op == "startswith"
+            and isinstance(lookup.value, str)
+        ):
+            mask = np.zeros(len(self._metadata["jobs"]), bool)
+            mask[self._prefix_index(lookup.field).lookup(lookup.value)] = True
+            return mask
+        if lookup.field not in PARAM_FIELDS:
+            column = self._field_column(lookup.field)
+            return column_mask(column, lookup.op, lookup.value)
+
+        index = self._param_index(lookup.field)
+        if lookup.op not in ("exact", "in"):
+            return column_mask(index.column(lookup.key), lookup.op, lookup.value)
+        mask = np.zeros(len(self._metadata["jobs"]), bool)
+        if lookup.op == "exact":
+            mask[index.lookup(lookup.key, lookup.value)] = True
+        else:
+            mask[index.lookup_in(lookup.key, lookup.value)] = True
+        return mask
 
     def get_job(self, job_id: str) -> JobView:
+        """
+        Returns the job with the given ID. Like commit hashes in git, a job ID
+        can be shortened to any prefix that no other job ID starts with.
+
+        Raises:
+            AmbiguousJobIDError: If several job IDs start with the given one.
+            KeyError: If no job ID starts with the given one.
+        """
         if job_id not in self._job_view_cache:
-            if job_id not in self._metadata.get("jobs", {}):
-                raise KeyError(f"Job ID '{job_id}' not found.")
-            self._job_view_cache[job_id] = JobView(job_id, self)
+            if self._lazy:
+                found = self._ensure_job_loaded(job_id)
+            else:
+                found = job_id in self._metadata.get("jobs", {})
+            if not found:
+                job_id = self._expand_job_id(job_id)
+            if job_id not in self._job_view_cache:
+                self._job_view_cache[job_id] = JobView(job_id, self)
         return self._job_view_cache[job_id]
 
+    def _expand_job_id(self, prefix: str) -> str:
+        """Returns the only job ID starting with prefix, from all loaded jobs."""
+        matches: Sequence[int] = ()
+        if isinstance(prefix, str) and prefix and "jobs" in self._metadata:
+            matches = self._prefix_index("id").lookup(prefix)
+        if len(matches) == 1:
+            return self._metadata["jobs"].ids[matches[0]]
+        if len(matches) > 1:
+            table: JobTable = self._metadata["jobs"]
+            raise AmbiguousJobIDError(
+                prefix, [table.ids[index] for index in matches.tolist()]
+            )
+        raise KeyError(f"Job ID '{prefix}' not found.")
+
     def get_run_for_job(self, job_id: str) -> Tuple[str, Dict[str, Any]]:
+        """
+        Returns the name and metadata of the run holding a job; the last run
+        listed wins for a job in several runs. In lazy mode, this loads the
+        pending runs, since any of them may define the job again.
+        """
+        self._ensure_all_runs_loaded()
         run_name = self._job_to_run_map.get(job_id)
         if not run_name:
             raise KeyError(f"Could not find a run containing job '{job_id}'.")
-        return run_name, self.runs()[run_name]
+        return run_name, self._metadata["runs"][run_name]
 
-    def jobs(self) -> JobCollection:
-        return JobCollection(self, self._metadata.get("jobs", {}).keys())
+    def jobs(self, run: Optional[str] = None) -> JobCollection:
+        """
+        Returns the jobs of the lab, or only those of the given run. In lazy mode,
+        a run-scoped query loads only the metadata needed to find that run.
+        """
+        if run is None:
+            self._ensure_all_runs_loaded()
+            return JobCollection._from_indices(
+                self, np.arange(len(self._metadata["jobs"]))
+            )
+        if not self._ensure_run_loaded(run):
+            raise KeyError(f"Run '{run}' not found.")
+        return JobCollection(self, self._metadata["runs"][run].get("jobs", {}).keys())
+
+    def ancestors(
+        self, jobs: Union[str, JobView, Iterable[Union[str, JobView]]]
+    ) -> JobCollection:
+        """
+        Returns the jobs that a job, or any of several jobs, depends on directly
+        or transitively, in load order. A given job is only included if another
+        given job depends on it.
+        """
+        return self._closure(jobs, upstream=True)
+
+    def descendants(
+        self, jobs: Union[str, JobView, Iterable[Union[str, JobView]]]
+    ) -> JobCollection:
+        """
+        Returns the jobs that depend, directly or transitively, on a job or on
+        any of several jobs, in load order. A given job is only included if it
+        depends on another given job.
+        """
+        return self._closure(jobs, upstream=False)
+
+    def dependency_graph(self) -> JobGraph:
+        """
+        Returns the dependency graph of all jobs as CSR NumPy arrays, with the
+        output and input keys of each edge. See JobGraph.
+        """
+        self._ensure_all_runs_loaded()
+        return self._metadata["jobs"].graph()
+
+    def _closure(
+        self,
+        jobs: Union[str, JobView, Iterable[Union[str, JobView]]],
+        upstream: bool,
+    ) -> JobCollection:
+        if isinstance(jobs, (str, JobView)):
+            jobs = [jobs]
+        job_ids = [job if isinstance(job, str) else job.id for job in jobs]
+        if self._lazy:
+            if upstream:
+                for job_id in job_ids:
+                    self._ensure_upstream_loaded(job_id)
+            else:
+                self._ensure_all_runs_loaded()
+
+        table: JobTable = self._metadata["jobs"]
+        for job_id in job_ids:
+            if job_id not in table:
+                raise KeyError(f"Job ID '{job_id}' not found.")
+        indices = table.closure(map(table.index_of, job_ids), upstream)
+        return JobCollection._from_indices(self, indices)
 
-    def runs(self) -> Dict[str, Any]:
+    def runs(self) -> Mapping[str, Any]:
+        if self._lazy and self._pending_runs:
+            return _LazyRunMapping(self)
         return self._metadata.get("runs", {})
+
+    def refresh(self) -> Set[str]:
+        """
+        Updates the experiment in place from the metadata files that changed on
+        disk since they were read.
+
+        Files are compared by size and mtime, and only changed or newly listed
+        run metadata files are decoded again. Effective parameters are recomputed,
+        and cached job views dropped, for the changed jobs and their descendants
+        only. In lazy mode, runs that were not loaded yet are left pending.
+        Experiments built from preloaded metadata have nothing to refresh.
+
+        Returns:
+            The IDs of the jobs that were added, changed or removed, together with
+            the IDs of their descendants.
+        """
+        if self._manifest_path is None:
+            return set()
+
+        manifest_path = self._find_lab_manifest()
+        root_files = (self._manifest_path, self._root_metadata_path)
+        if manifest_path != self._manifest_path or any(
+            file_signature(path) != self._source_files.get(str(path))
+            for path in root_files
+        ):
+            for path in root_files:
+                self._source_files.pop(str(path), None)
+            self._metadata["root"] = self._read_lab_root(manifest_path)
+
+        listed = [str(path) for path in self._listed_run_paths()]
+        if self._lazy:
+            self._pending_runs = deque(
+                Path(path) for path in listed if path not in self._run_paths
+            )
+            listed = [path for path in listed if path in self._run_paths]
+        listed_set = set(listed)
+        stale = [
+            path
+            for path in listed
+            if path not in self._run_paths
+            or file_signature(path) != self._source_files.get(path)
+        ]
+        dropped = [path for path in self._run_paths if path not in listed_set]
+        if not stale and not dropped:
+            return set()
+
+        runs = self._metadata["runs"]
+        table: JobTable = self._metadata["jobs"]
+        old_jobs = {}
+        for path in stale + dropped:
+            run_name = self._run_paths.get(path)
+            for job_id in runs[run_name]["jobs"] if run_name in runs else ():
+                old_jobs[job_id] = table.packed(table.index_of(job_id))
+
+        # Signatures are only kept once every stale file decoded, so that a file
+        # caught mid-write is read again by the next refresh.
+        old_signatures = {path: self._source_files.pop(path, None) for path in stale}
+        try:
+            decoded = {
+                str(path): run_data
+                for path, run_data in self._read_run_metadata_files(
+                    [Path(path) for path in stale]
+                )
+            }
+        except Exception:
+            self._source_files.update(old_signatures)
+            raise
+        for path in dropped:
+            del self._run_paths[path]
+            self._source_files.pop(path, None)
+        new_runs: Dict[str, Dict[str, Any]] = {}
+        new_jobs: Dict[str, Any] = {}
+        for path in listed:
+            if path in decoded:
+                run_data = decoded[path]
+                run_name = self._check_run(Path(path), run_data)
+                if run_name is not None:
+                    new_jobs.update(
+                        (job_id, table.pack(job_id, job_data))
+                        for job_id, job_data in run_data.get("jobs", {}).items()
+                    )
+            else:
+                run_name = self._run_paths[path]
+                run_data = runs.get(run_name)
+            if run_name is not None:
+                new_runs[run_name] = run_data
+
+        removed = old_jobs.keys() - new_jobs.keys()
+        for path in listed:
+            if removed and path not in decoded and self._run_paths[path] in new_runs:
+                run_jobs = new_runs[self._run_paths[path]]["jobs"]
+                removed = {job_id for job_id in removed if job_id not in run_jobs}
+
+        if removed:
+            # A JobTable cannot drop jobs, so unchanged jobs move to a new one.
+            new_table = JobTable()
+            for run_name, run_data in new_runs.items():
+                run_jobs = run_data.get("jobs", {})
+                for job_id in run_jobs:
+                    new_table.add(
+                        job_id,
+                        (
+                            new_jobs[job_id]
+                            if job_id in new_jobs
+                            else table.packed(table.index_of(job_id))
+                        ),
+                    )
+                run_data["jobs"] = new_table.view(run_jobs)
+            self._metadata["jobs"] = table = new_table
+            self._job_view_cache.clear()
+        else:
+            table.update(new_jobs)
+            for path in decoded:
+                run_name = self._run_paths.get(path)
+                if run_name is not None:
+                    new_runs[run_name]["jobs"] = table.view(
+                        decoded[path].get("jobs", {})
+                    )
+
+        table.release_pools()
+        self._metadata["runs"] = new_runs
+        self._job_to_run_map = {}
+        self._index_runs()
+        # Runs may have been renamed or regrouped without any job changing.
+        self._field_columns.pop("run", None)
+
+        changed = set(removed)
+        changed.update(
+            job_id
+            for job_id, packed in new_jobs.items()
+            if old_jobs.get(job_id) != packed
+        )
+        affected = self._with_descendants(changed)
+        if affected:
+            self._param_indexes.clear()
+            self._field_columns.clear()
+            self._prefix_indexes.clear()
+        for job_id in affected:
+            self._effective_params_cache.pop(job_id, None)
+            self._job_view_cache.pop(job_id, None)
+
+        if not self._lazy_params:
+            self._calculate_effective_params(
+                [job_id for job_id in affected if job_id in table],
+                self._effective_params_cache,
+            )
+        if self._snapshot_path is not None:
+            self._write_snapshot()
+
+        logger.debug(
+            f"Refreshed {len(stale)} run metadata file(s); "
+            f"{len(changed)} job(s) changed, {len(affected)} affected."
+        )
+        return affected
+
+    def watch(
+        self,
+        callback: Optional[Callable[[Set[str]], None]] = None,
+        interval: float = 1.0,
+        backend: str = "auto",
+        start: bool = True,
+    ) -> "LabWatcher":
+        """
+        Keeps the experiment up to date as its lab and job store change, calling
+        callback with the set of changed or newly completed job IDs. See
+        LabWatcher for details; call stop() on the returned watcher when done.
+        """
+        from .watch import LabWatcher
+
+        watcher = LabWatcher(self, callback, interval=interval, backend=backend)
+        return watcher.start() if start else watcher
+
+    def _with_descendants(self, job_ids: Set[str]) -> Set[str]:
+        """Returns the given job IDs together with those of all their descendants."""
+        if not job_ids:
+            return set()
+        table: JobTable = self._metadata["jobs"]
+        result = set(job_ids)
+        starts = []
+        for job_id in job_ids:
+            if job_id in table:
+                starts.append(table.index_of(job_id))
+            else:
+                # Jobs still referencing a removed job wait for it to come back.
+                starts.extend(table.waiting_for(job_id))
+        result.update(table.ids[index] for index in starts)
+        descendants = table.closure(starts, upstream=False)
+        result.update(table.ids[index] for index in descendants.tolist())
+        return result
+
+
+class _LazyRunMapping(Mapping[str, Any]):
+    """
+    Read-only view of an Experiment's runs in lazy mode. Looking up a run by name
+    loads pending runs until it is found; iterating loads all of them.
+    """
+
+    def __init__(self, experiment: Experiment):
+        self._exp = experiment
+
+    def __getitem__(self, run_name: str) -> Dict[str, Any]:
+        if not self._exp._ensure_run_loaded(run_name):
+            raise KeyError(run_name)
+        return self._exp._metadata["runs"][run_name]
+
+    def __iter__(self) -> Iterator[str]:
+        self._exp._ensure_all_runs_loaded()
+        return iter(self._exp._metadata["runs"])
+
+    def __len__(self) -> int:
+        self._exp._ensure_all_runs_loaded()
+        return len(self._exp._metadata["runs"])
@@ -0,0 +1,215 @@
+from typing import Any, Dict, Iterator, List, Mapping, Optional, Sequence
+
+MAX_LAYER_DEPTH = 32
+
+_EMPTY: Dict[str, Any] = {}
+_UNSET = object()
+
+
+class LayeredParams(Mapping[str, Any]):
+    """
+    Read-only effective parameters of a job, kept as the job's own parameters
+    layered over the effective parameters of its dependencies.
+
+    It behaves as the dict obtained by merging the parent layers in order, then
+    the own parameters, which to_dict() materialises. Layers are shared between
+    jobs instead of being copied into each of them, and layers nested deeper
+    than MAX_LAYER_DEPTH are flattened so that lookups stay cheap.
+    """
+
+    __slots__ = ("_own", "_parents", "_depth", "_flat")
+
+    def __init__(
+        self,
+        own: Mapping[str, Any] = _EMPTY,
+        parents: Sequence["LayeredParams"] = (),
+    ):
+        self._own = own
+        self._parents = tuple(parents)
+        self._flat: Optional[Dict[str, Any]] = None
+        self._depth = 1 + max((parent._depth for parent in self._parents), default=0)
+        if self._depth > MAX_LAYER_DEPTH:
+            self._own = self._materialised()
+            self._parents = ()
+            self._flat = None
+            self._depth = 1
+
+    @classmethod
+    def build(
+        cls,
+        own: Mapping[str, Any],
+        parents: Sequence["LayeredParams"],
+        shared: Optional[Dict[int, "LayeredParams"]] = None,
+    ) -> "LayeredParams":
+        """
+        Returns the layer of own parameters over parents. Parents without any
+        parameter, and repeats of the previous parent, are dropped; a layer
+        without own parameters over a single parent is that parent itself.
+
+        Layers without parents are looked up in 'shared', keyed by the id() of
+        their own parameters, so that jobs sharing a params dict (such as those
+        pooled by a JobTable) share a layer too.
+        """
+        kept: List[LayeredParams] = []
+        depth = 0
+        for parent in parents:
+            if (parent._own or parent._parents) and not (kept and parent is kept[-1]):
+                kept.append(parent)
+                if parent._depth > depth:
+                    depth = parent._depth
+        if not own:
+            if not kept:
+                return EMPTY_PARAMS
+            if len(kept) == 1:
+                return kept[0]
+        if depth >= MAX_LAYER_DEPTH:
+            return cls(own, kept)
+        if shared is not None and not kept:
+            layer = shared.get(id(own))
+            if layer is not None and layer._own is own:
+                return layer
+
+        # Called once per job, so the checks done by __init__ are skipped.
+        layer = object.__new__(cls)
+        layer._own = own
+        layer._parents = tuple(kept)
+        layer._flat = None
+        layer._depth = depth + 1
+        if shared is not None and not kept:
+            shared[id(own)] = layer
+        return layer
+
+    def _materialised(self) -> Mapping[str, Any]:
+        """
+        Returns the merged parameters, built from the parents' merged parameters
+        and kept on the layer, so that flattening costs the size of the parents
+        rather than a walk over all the ancestors. The result must not be
+        modified.
+        """
+        if not self._parents:
+            return self._own
+        if self._flat is None:
+            # Merging each parent's parameters in turn gives the same keys,
+            # order and values as to_dict(): a layer repeated through an
+            # earlier parent is overridden by its occurrence in a later one.
+            flat: Dict[str, Any] = {}
+            for parent in self._parents:
+                flat.update(parent._materialised())
+            flat.update(self._own)
+            self._flat = flat
+        return self._flat
+
+    def _backward(self) -> Iterator[Mapping[str, Any]]:
+        """
+        Yields the own parameters of each layer, latest merged first. A layer
+        met again is skipped, as its later occurrence already took precedence.
+        """
+        seen = set()
+        stack = [self]
+        while stack:
+            layer = stack.pop()
+            if id(layer) not in seen:
+                seen.add(id(layer))
+                yield layer._own
+                stack.extend(layer._parents)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Materialises the parameters as a new plain dict."""
+        if not self._parents:
+            return dict(self._own)
+
+        # Keys are ordered by first occurrence in merge order, while values come
+        # from the latest occurrence, found by walking the layers backwards.
+        result: Dict[str, Any] = {}
+        seen = set()
+        repeated = False
+        stack = [(self, False)]
+        while stack:
+            layer, expanded = stack.pop()
+            if expanded:
+                result.update(layer._own)
+            elif id(layer) in seen:
+                repeated = True
+            else:
+                seen.add(id(layer))
+                stack.append((layer, True))
+                stack.extend((parent, False) for parent in reversed(layer._parents))
+
+        if repeated:
+            assigned = set()
+            for own in self._backward():
+                for key, value in own.items():
+                    if key not in assigned:
+                        assigned.add(key)
+                        result[key] = value
+        return result
+
+    def copy(self) -> Dict[str, Any]:
+        return self.to_dict()
+
+    def keys(self):
+        return self.to_dict().keys()
+
+    def items(self):
+        return self.to_dict().items()
+
+    def values(self):
+        return self.to_dict().values()
+
+    def __getitem__(self, key: str) -> Any:
+        if key in self._own:
+            return self._own[key]
+        for own in self._backward():
+            if key in own:
+                return own[key]
+        raise KeyError(key)
+
+    def get_memoised(self, key: str, default: Any, memo: Dict[int, Any]) -> Any:
+        """
+        Same as get(), remembering the value found for each layer in memo, by
+        id(), so that looking a key up in many jobs sharing layers visits each
+        layer once. A memo must only be reused for the same key and default.
+        """
+        value = memo.get(id(self), _UNSET)
+        if value is _UNSET:
+            if key in self._own:
+                value = self._own[key]
+            else:
+                # Same order as __getitem__: the latest parent layer wins.
+                value = default
+                for parent in reversed(self._parents):
+                    found = parent.get_memoised(key, default, memo)
+                    if found is not default:
+                        value = found
+                        break
+            memo[id(self)] = value
+        return value
+
+    def __contains__(self, key: object) -> bool:
+        return any(key in own for own in self._backward())
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.to_dict())
+
+    def __len__(self) -> int:
+        return len(self.to_dict())
+
+    def __eq__(self, other: object) -> bool:
+        if self is other:
+            return True
+        if isinstance(other, LayeredParams):
+            return self.to_dict() == other.to_dict()
+        if isinstance(other, Mapping):
+            return self.to_dict() == dict(other)
+        return NotImplemented
+
+    __hash__ = None  # type: ignore[assignment]
+
+    def __reduce__(self):
+        return type(self), (self._own, self._parents)
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self.to_dict()!r})"
+
+
+EMPTY_PARAMS = LayeredParams()
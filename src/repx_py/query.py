@@ -0,0 +1,497 @@
+import operator
+import sys
+from bisect import bisect_left
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Hashable,
+    Iterator,
+    List,
+    Mapping,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+)
+
+import numpy as np
+import pandas as pd
+
+from .params import LayeredParams
+
+# Job fields holding parameter mappings, which filters address by key, as in
+# 'params__lr=0.01' or 'effective_params__seed__gt=3'.
+PARAM_FIELDS = ("params", "effective_params")
+
+# Job fields stored as columns of the JobTable.
+COLUMN_FIELDS = ("id", "name", "stage_type")
+
+OPERATORS = (
+    "exact",
+    "in",
+    "gt",
+    "ge",
+    "lt",
+    "le",
+    "range",
+    "startswith",
+    "endswith",
+    "contains",
+    "regex",
+    "isnull",
+)
+
+_COMPARISONS: Dict[str, Callable[[Any, Any], Any]] = {
+    "gt": operator.gt,
+    "ge": operator.ge,
+    "lt": operator.lt,
+    "le": operator.le,
+}
+
+_MISSING = object()
+_EXACT_FLOAT_INT = 2**53
+_NO_JOBS = np.zeros(0, np.int64)
+
+
+class Lookup(NamedTuple):
+    """
+    A compiled filter keyword: 'name__startswith="a"' becomes
+    Lookup("name", None, "startswith", "a"), and 'params__lr__gt=0.1' becomes
+    Lookup("params", "lr", "gt", 0.1).
+    """
+
+    field: str
+    key: Optional[str]
+    op: str
+    value: Any
+
+
+class Column(NamedTuple):
+    """
+    The values of a job field or parameter, coded: job i has the value
+    values[codes[i]], or none at all where codes[i] is -1.
+    """
+
+    codes: np.ndarray
+    values: List[Any]
+
+
+def parse_lookup(keyword: str, value: Any) -> Lookup:
+    """
+    Compiles a filter keyword. Parameter keys may contain '__' as long as they
+    do not end with an operator name.
+
+    Raises:
+        ValueError: If the keyword names an unknown operator.
+    """
+    field, sep, rest = keyword.partition("__")
+    key = None
+    if field in PARAM_FIELDS and sep:
+        key, sep, op = rest.rpartition("__")
+        if not sep or op not in OPERATORS:
+            key, op = rest, "exact"
+    else:
+        op = rest if sep else "exact"
+
+    if op not in OPERATORS:
+        raise ValueError(
+            f"Unknown filter operator '__{op}' in '{keyword}'. "
+            f"Supported operators: {', '.join(OPERATORS)}."
+        )
+    if op == "range" and (not isinstance(value, (list, tuple)) or len(value) != 2):
+        raise ValueError(f"'{keyword}' expects a (low, high) pair, got {value!r}.")
+    return Lookup(field, key, op, value)
+
+
+def freeze(value: Any) -> Hashable:
+    """Returns a hashable stand-in for a decoded JSON value, equal where it is."""
+    if isinstance(value, list):
+        return tuple(freeze(item) for item in value)
+    if isinstance(value, Mapping):
+        return frozenset((key, freeze(item)) for key, item in value.items())
+    return value
+
+
+def _freeze_typed(value: Any) -> Hashable:
+    """
+    Returns a hashable stand-in for a decoded JSON value, like freeze(), but
+    telling apart equal values of different types, such as True, 1 and 1.0.
+    """
+    if isinstance(value, list):
+        return list, tuple(_freeze_typed(item) for item in value)
+    if isinstance(value, Mapping):
+        return dict, frozenset(
+            (key, _freeze_typed(item)) for key, item in value.items()
+        )
+    return type(value), value
+
+
+def value_mask(values: Sequence[Any], op: str, arg: Any) -> np.ndarray:
+    """
+    Evaluates an operator over a sequence of values at once, returning a
+    boolean mask. Comparisons only hold between numbers, or between strings;
+    string operators apply to str() of the values, and 'regex' searches them.
+    """
+    if op == "exact":
+        arg = freeze(arg)
+        return np.fromiter((freeze(v) == arg for v in values), bool, len(values))
+    if op == "in":
+        args = {freeze(v) for v in arg}
+        return np.fromiter((freeze(v) in args for v in values), bool, len(values))
+    if op == "isnull":
+        isnull = np.fromiter((v is None for v in values), bool, len(values))
+        return isnull if arg else ~isnull
+    if op == "range":
+        return value_mask(values, "ge", arg[0]) & value_mask(values, "le", arg[1])
+
+    series = pd.Series(values, dtype=object)
+    if op in _COMPARISONS:
+        mask = np.zeros(len(values), bool)
+        if _is_number(arg):
+            kinds = series.map(_is_number).to_numpy(bool)
+            operands = _numbers(series[kinds].tolist(), arg)
+        elif isinstance(arg, str):
+            kinds = series.map(lambda v: isinstance(v, str)).to_numpy(bool)
+            operands = series[kinds].to_numpy(object)
+        else:
+            return mask
+        mask[kinds] = _COMPARISONS[op](operands, arg)
+        return mask
+
+    strings = series.astype(str).str
+    if op == "startswith":
+        result = strings.startswith(arg)
+    elif op == "endswith":
+        result = strings.endswith(arg)
+    elif op == "contains":
+        result = strings.contains(arg, regex=False)
+    else:
+        result = strings.contains(arg, regex=True)
+    return result.to_numpy(bool)
+
+
+def _numbers(values: List[Any], arg: Any) -> np.ndarray:
+    """
+    Returns numbers as an array to compare with arg without rounding: int64
+    when all are ints, float64 when no int is beyond the 2**53 that floats hold
+    exactly, and Python objects otherwise.
+    """
+    ints = [value for value in values if isinstance(value, int)]
+    if isinstance(arg, int):
+        ints.append(arg)
+    if len(ints) == len(values) + 1:
+        try:
+            np.int64(arg)
+            return np.array(values, np.int64)
+        except OverflowError:
+            return np.array(values, object)
+    if ints and max(map(abs, ints)) > _EXACT_FLOAT_INT:
+        return np.array(values, object)
+    return np.array(values, float)
+
+
+def is_columnar(lookup: Lookup) -> bool:
+    """
+    Whether a lookup is evaluated on columns rather than job by job. Lookups on
+    whole parameter mappings, without a key, are matched job by job.
+    """
+    if lookup.field in PARAM_FIELDS:
+        return lookup.key is not None
+    return lookup.field in COLUMN_FIELDS
+
+
+def job_matches(job: Any, lookup: Lookup) -> bool:
+    """Checks a lookup on a single job, by reading the field from the job."""
+    if not hasattr(job, lookup.field):
+        return False
+    value = getattr(job, lookup.field)
+    if lookup.key is not None:
+        value = value.get(lookup.key, _MISSING)
+        if value is _MISSING:
+            return lookup.op == "isnull" and bool(lookup.value)
+    return bool(value_mask([value], lookup.op, lookup.value)[0])
+
+
+def column_mask(column: Column, op: str, arg: Any) -> np.ndarray:
+    """Evaluates an operator over a column, once per distinct value."""
+    missing = op == "isnull" and bool(arg)
+    return np.append(value_mask(column.values, op, arg), missing)[column.codes]
+
+
+def factorize(values: Sequence[Any]) -> Column:
+    """Codes a sequence of hashable values as a Column, None being a value."""
+    codes: Dict[Hashable, int] = {}
+    coded = np.fromiter(
+        (codes.setdefault(value, len(codes)) for value in values), np.int64, len(values)
+    )
+    return Column(coded, list(codes))
+
+
+def bitmap_from_indices(indices: np.ndarray, size: int) -> int:
+    """Packs job indices into a bitmap, as an int whose bit i is set for job i."""
+    mask = np.zeros(size, bool)
+    mask[indices] = True
+    return int.from_bytes(np.packbits(mask, bitorder="little").tobytes(), "little")
+
+
+def bitmap_indices(bitmap: int) -> np.ndarray:
+    """Returns the sorted job indices set in a bitmap."""
+    packed = np.frombuffer(
+        bitmap.to_bytes((bitmap.bit_length() + 7) // 8, "little"), np.uint8
+    )
+    return np.flatnonzero(np.unpackbits(packed, bitorder="little"))
+
+
+def _is_number(value: Any) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+class ParamIndex:
+    """
+    Columnar and inverted index of one parameter field (such as 'params') over
+    the jobs of a JobTable.
+
+    Each parameter key is indexed on its first lookup and kept for later ones:
+    as a Column of coded values, which operators are evaluated on, and for
+    equality lookups as a mapping of values to the sorted indices of the jobs.
+    Jobs sharing the same parameter mapping object, as jobs pooled by a
+    JobTable or sharing effective parameters do, are indexed together.
+    """
+
+    def __init__(self, mappings: Sequence[Mapping[str, Any]]):
+        """
+        Args:
+            mappings: The parameter mapping of each job, by job index.
+        """
+        self.size = len(mappings)
+        mapping_ids = np.fromiter(map(id, mappings), np.uint64, len(mappings))
+        _, first, inverse = np.unique(
+            mapping_ids, return_index=True, return_inverse=True
+        )
+        # Distinct mappings are kept in job order rather than in the address
+        # order np.unique() sorts them in, so that values are coded the same
+        # way from one load to the next.
+        order = np.argsort(first)
+        rank = np.empty_like(order)
+        rank[order] = np.arange(len(order))
+        self._inverse = rank[inverse]
+        self._mappings = [mappings[index] for index in first[order].tolist()]
+        self._columns: Dict[str, Column] = {}
+        self._inverted: Dict[str, Dict[Hashable, np.ndarray]] = {}
+
+    def column(self, key: str) -> Column:
+        return self._coded(key)
+
+    def lookup(self, key: str, value: Any) -> np.ndarray:
+        """Returns the indices of the jobs whose parameter 'key' equals value."""
+        return self._inverted_index(key).get(freeze(value), _NO_JOBS)
+
+    def lookup_in(self, key: str, values: Sequence[Any]) -> np.ndarray:
+        """Returns the indices of the jobs whose parameter 'key' is in values."""
+        index = self._inverted_index(key)
+        found = [
+            index[value] for value in {freeze(v) for v in values} if value in index
+        ]
+        if not found:
+            return _NO_JOBS
+        return np.unique(np.concatenate(found)) if len(found) > 1 else found[0]
+
+    def _coded(self, key: str) -> Column:
+        if key not in self._columns:
+            # Values are coded once per distinct mapping, then spread to jobs.
+            codes: Dict[Hashable, int] = {}
+            values: List[Any] = []
+            memo: Dict[int, Any] = {}
+            mapping_codes = []
+            for mapping in self._mappings:
+                if isinstance(mapping, LayeredParams):
+                    value = mapping.get_memoised(key, _MISSING, memo)
+                else:
+                    value = mapping.get(key, _MISSING)
+                if value is _MISSING:
+                    mapping_codes.append(-1)
+                    continue
+                frozen = _freeze_typed(value)
+                code = codes.get(frozen)
+                if code is None:
+                    code = codes[frozen] = len(values)
+                    values.append(value)
+                mapping_codes.append(code)
+
+            job_codes = np.array(mapping_codes, np.int64)[self._inverse]
+            self._columns[key] = Column(job_codes, values)
+        return self._columns[key]
+
+    def _inverted_index(self, key: str) -> Dict[Hashable, np.ndarray]:
+        if key not in self._inverted:
+            column = self._coded(key)
+            order = np.argsort(column.codes, kind="stable")
+            bounds = np.searchsorted(
+                column.codes[order], np.arange(len(column.values) + 1)
+            )
+            # Equal values of different types have their own codes, and are
+            # looked up together.
+            inverted: Dict[Hashable, List[np.ndarray]] = {}
+            for code, value in enumerate(column.values):
+                jobs = order[bounds[code] : bounds[code + 1]]
+                inverted.setdefault(freeze(value), []).append(jobs)
+            self._inverted[key] = {
+                value: jobs[0] if len(jobs) == 1 else np.sort(np.concatenate(jobs))
+                for value, jobs in inverted.items()
+            }
+        return self._inverted[key]
+
+
+class PrefixIndex:
+    """
+    The indices of the jobs of a JobTable sorted by a string column, such as
+    'id' or 'name', to find the jobs whose value starts with a prefix by
+    binary search. Values that are not strings are indexed as their str().
+    """
+
+    def __init__(self, values: Sequence[Any]):
+        """
+        Args:
+            values: The value of each job, by job index.
+        """
+        self.size = len(values)
+        strings = [value if isinstance(value, str) else str(value) for value in values]
+        order = sorted(range(len(strings)), key=strings.__getitem__)
+        self._keys = [strings[index] for index in order]
+        self._order = np.array(order, np.int64)
+
+    def lookup(self, prefix: str) -> np.ndarray:
+        """Returns the sorted indices of the jobs whose value starts with prefix."""
+        start = bisect_left(self._keys, prefix)
+        if not prefix:
+            stop = len(self._keys)
+        elif prefix[-1] == chr(sys.maxunicode):
+            stop = start
+            while stop < len(self._keys) and self._keys[stop].startswith(prefix):
+                stop += 1
+        else:
+            # Values starting with prefix sort before its successor.
+            stop = bisect_left(self._keys, prefix[:-1] + chr(ord(prefix[-1]) + 1))
+        return np.sort(self._order[start:stop])
+
+
+class Q:
+    """
+    A filter condition that can be combined with '&' and '|' and negated with
+    '~', as in Q(params__lr__lt=0.01) | ~Q(name__startswith="debug"). The
+    keyword lookups of a single Q must all hold.
+    """
+
+    AND = "AND"
+    OR = "OR"
+
+    def __init__(self, *children: "Q", **lookups: Any):
+        self.children: List[Union["Q", Lookup]] = list(children)
+        for child in self.children:
+            if not isinstance(child, Q):
+                raise TypeError(f"Q only combines Q objects, got {child!r}.")
+        self.children.extend(
+            parse_lookup(keyword, value) for keyword, value in lookups.items()
+        )
+        self.connector = Q.AND
+        self.negated = False
+
+    def _combine(self, other: "Q", connector: str) -> "Q":
+        if not isinstance(other, Q):
+            return NotImplemented
+        combined = Q(self, other)
+        combined.connector = connector
+        return combined
+
+    def __and__(self, other: "Q") -> "Q":
+        return self._combine(other, Q.AND)
+
+    def __or__(self, other: "Q") -> "Q":
+        return self._combine(other, Q.OR)
+
+    def __invert__(self) -> "Q":
+        negated = Q(self)
+        negated.negated = True
+        return negated
+
+    def lookups(self) -> Iterator[Lookup]:
+        """Yields the lookups of the condition, depth first."""
+        for child in self.children:
+            if isinstance(child, Q):
+                yield from child.lookups()
+            else:
+                yield child
+
+    def bounds(
+        self, masks: Mapping[int, Optional[np.ndarray]], size: int
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Evaluates the condition over all job indices at once, from the masks of
+        its columnar lookups (by id() of the lookup, None for other lookups).
+
+        Returns:
+            Two boolean masks: the jobs that certainly match, and those that
+            may match, depending on the lookups that have no mask.
+        """
+        if self.connector == Q.AND:
+            lower, upper = np.ones(size, bool), np.ones(size, bool)
+        else:
+            lower, upper = np.zeros(size, bool), np.zeros(size, bool)
+        for child in self.children:
+            if isinstance(child, Q):
+                child_lower, child_upper = child.bounds(masks, size)
+            elif masks[id(child)] is None:
+                child_lower, child_upper = np.zeros(size, bool), np.ones(size, bool)
+            else:
+                child_lower = child_upper = masks[id(child)]
+            if self.connector == Q.AND:
+                lower &= child_lower
+                upper &= child_upper
+            else:
+                lower |= child_lower
+                upper |= child_upper
+        if self.negated:
+            return ~upper, ~lower
+        return lower, upper
+
+    def matches(
+        self, job: Any, index: int, masks: Mapping[int, Optional[np.ndarray]]
+    ) -> bool:
+        """Evaluates the condition on a single job, reusing the lookup masks."""
+        results = (
+            (
+                child.matches(job, index, masks)
+                if isinstance(child, Q)
+                else (
+                    job_matches(job, child)
+                    if masks[id(child)] is None
+                    else bool(masks[id(child)][index])
+                )
+            )
+            for child in self.children
+        )
+        matched = all(results) if self.connector == Q.AND else any(results)
+        return matched != self.negated
+
+    def __repr__(self) -> str:
+        if self.negated and len(self.children) == 1:
+            return f"~{self.children[0]!r}"
+        if all(isinstance(child, Lookup) for child in self.children):
+            text = f"Q({', '.join(map(_format_lookup, self.children))})"
+        else:
+            symbol = " & " if self.connector == Q.AND else " | "
+            text = f"({symbol.join(map(_format_child, self.children))})"
+        return f"~{text}" if self.negated else text
+
+
+def _format_child(child: Union[Q, Lookup]) -> str:
+    return repr(child) if isinstance(child, Q) else f"Q({_format_lookup(child)})"
+
+
+def _format_lookup(lookup: Lookup) -> str:
+    keyword = "__".join(
+        part for part in (lookup.field, lookup.key, lookup.op) if part is not None
+    )
+    return f"{keyword}={lookup.value!r}"
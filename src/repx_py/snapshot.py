@@ -0,0 +1,100 @@
+import hashlib
+import logging
+import os
+import pickle
+import tempfile
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_VERSION = 3
+
+FileSignature = Optional[Tuple[int, int]]
+
+
+def default_snapshot_dir() -> Path:
+    """Returns the per-user directory where metadata snapshots are kept."""
+    base = os.environ.get("XDG_CACHE_HOME")
+    return (Path(base) if base else Path.home() / ".cache") / "repx-py" / "snapshots"
+
+
+def snapshot_file(lab_path: Path, directory: Union[str, Path, None] = None) -> Path:
+    """Returns the snapshot file used for a given (resolved) lab path."""
+    digest = hashlib.sha256(str(lab_path).encode()).hexdigest()[:24]
+    return Path(directory or default_snapshot_dir()) / f"{digest}.pickle"
+
+
+def file_signature(path: Union[str, Path]) -> FileSignature:
+    """
+    Returns the (size, mtime_ns) pair identifying the current version of a file,
+    or None if the file does not exist.
+    """
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_size, st.st_mtime_ns
+
+
+def read_snapshot(
+    path: Path, lab_path: Path, manifest_path: Path
+) -> Optional[Dict[str, Any]]:
+    """
+    Loads the payload of a snapshot if it is still valid for the given lab.
+
+    The snapshot header is decoded first, so a stale snapshot is rejected after
+    a handful of stat calls, without unpickling the payload.
+    """
+    try:
+        with open(path, "rb") as f:
+            header = pickle.load(f)
+            if header.get("version") != SNAPSHOT_VERSION:
+                return None
+            if header.get("lab_path") != str(lab_path):
+                return None
+            if header.get("manifest") != str(manifest_path):
+                return None
+            for file_path, signature in header.get("files", {}).items():
+                if file_signature(file_path) != signature:
+                    logger.debug(f"Snapshot {path} is stale: {file_path} changed.")
+                    return None
+            return pickle.load(f)
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        logger.debug(f"Ignoring unreadable snapshot {path}: {e}")
+        return None
+
+
+def write_snapshot(
+    path: Path,
+    lab_path: Path,
+    manifest_path: Path,
+    files: Dict[str, FileSignature],
+    payload: Dict[str, Any],
+):
+    """Atomically writes a snapshot. Failures are logged and otherwise ignored."""
+    header = {
+        "version": SNAPSHOT_VERSION,
+        "lab_path": str(lab_path),
+        "manifest": str(manifest_path),
+        "files": files,
+    }
+    tmp_name = None
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with tempfile.NamedTemporaryFile(
+            "wb", dir=path.parent, prefix=path.name, suffix=".tmp", delete=False
+        ) as f:
+            tmp_name = f.name
+            pickle.dump(header, f, protocol=pickle.HIGHEST_PROTOCOL)
+            pickle.dump(payload, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_name, path)
+    except OSError as e:
+        logger.warning(f"Could not write metadata snapshot to {path}: {e}")
+        if tmp_name:
+            try:
+                os.unlink(tmp_name)
+            except OSError:
+                pass
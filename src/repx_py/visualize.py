@@ -1,13 +1,13 @@
 #!/usr/bin/env python3
 import argparse
 import collections
-import json
 import sys
 import re
 from pathlib import Path
 from typing import Any, Dict, List
 
 import graphviz
+from . import codec
 from .models import Experiment, JobView
 
 DPI = "300"
@@ -67,7 +67,7 @@ def get_varying_params(job_list: List[JobView]) -> Dict[str, List[Any]]:
             val = job.params.get(key, "?")
 
             if isinstance(val, (list, dict)):
-                val = json.dumps(val, sort_keys=True)
+                val = codec.dumps(val, sort_keys=True)
             values.add(val)
         if len(values) > 0:
              clean_values = [v for v in values if v != "?"]
@@ -92,32 +92,29 @@ def main():
         print(f"Error: {e}", file=sys.stderr)
         sys.exit(1)
 
-    grouped_jobs = collections.defaultdict(lambda: collections.defaultdict(list))
+    grouped_jobs = collections.defaultdict(dict)
     run_anchors = {}
 
     all_jobs = exp.jobs()
-    for job in all_jobs:
-        try:
-            rname, _ = exp.get_run_for_job(job.id)
-        except:
-            rname = "detached"
-        grouped_jobs[rname][job.name].append(job)
+    for (rname, name), jobs in all_jobs.group_by("run", "name").items():
+        rname = rname or "detached"
+        grouped_jobs[rname][name] = list(jobs)
         if rname not in run_anchors:
-            run_anchors[rname] = job.name
+            run_anchors[rname] = name
 
     intra_edges = collections.defaultdict(int)
     inter_edges = []
 
+    names = {job.id: job.name for job in all_jobs}
+    graph = exp.dependency_graph()
+    for i, job_id in enumerate(graph.job_ids):
+        tgt = names[job_id]
+        for parent in graph.indices[graph.indptr[i]:graph.indptr[i + 1]].tolist():
+            intra_edges[(names[graph.job_ids[parent]], tgt)] += 1
+
     for job in all_jobs:
         tgt = job.name
         for m in job.input_mappings:
-            sid = m.get("job_id")
-            if sid and sid != "self":
-                try:
-                    src = exp.get_job(sid).name
-                    intra_edges[(src, tgt)] += 1
-                except: pass
-
             srun = m.get("source_run")
             if srun:
                 dtype = m.get("dependency_type", "hard")
@@ -0,0 +1,317 @@
+import ctypes
+import ctypes.util
+import logging
+import os
+import select
+import struct
+import sys
+import threading
+from pathlib import Path
+from typing import TYPE_CHECKING, Callable, Dict, List, Optional, Set, Tuple
+
+from .models import LocalCacheResolver
+
+if TYPE_CHECKING:
+    from .models import Experiment
+
+logger = logging.getLogger(__name__)
+
+WATCH_BACKENDS = ("auto", "inotify", "poll")
+
+_IN_CLOSE_WRITE = 0x00000008
+_IN_MOVED_TO = 0x00000080
+_IN_CREATE = 0x00000100
+_IN_DELETE = 0x00000200
+_IN_NONBLOCK = 0x00000800
+_IN_CLOEXEC = 0x00080000
+_EVENT_HEADER = struct.Struct("iIII")
+
+_METADATA_EVENTS = _IN_CLOSE_WRITE | _IN_MOVED_TO | _IN_CREATE | _IN_DELETE
+_STORE_EVENTS = _IN_CREATE | _IN_MOVED_TO
+
+
+class _Inotify:
+    """
+    Minimal inotify binding through ctypes, with a pipe through which a blocked
+    read() can be woken up from another thread.
+    """
+
+    def __init__(self, libc: ctypes.CDLL):
+        self._libc = libc
+        self.fd = libc.inotify_init1(_IN_NONBLOCK | _IN_CLOEXEC)
+        if self.fd < 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, os.strerror(errno))
+        self._wake_r, self._wake_w = os.pipe()
+
+    @classmethod
+    def create(cls) -> Optional["_Inotify"]:
+        """Returns an inotify instance, or None where inotify is not available."""
+        if not sys.platform.startswith("linux"):
+            return None
+        try:
+            libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+            libc.inotify_add_watch.argtypes = [
+                ctypes.c_int,
+                ctypes.c_char_p,
+                ctypes.c_uint32,
+            ]
+            return cls(libc)
+        except (OSError, AttributeError) as e:
+            logger.debug(f"inotify is not available: {e}")
+            return None
+
+    def add_watch(self, path: str, mask: int) -> Optional[int]:
+        wd = self._libc.inotify_add_watch(self.fd, os.fsencode(path), mask)
+        return wd if wd >= 0 else None
+
+    def rm_watch(self, wd: int):
+        self._libc.inotify_rm_watch(self.fd, wd)
+
+    def read(self, timeout: Optional[float]) -> List[Tuple[int, int, str]]:
+        """Waits up to timeout seconds and returns pending (wd, mask, name) events."""
+        ready, _, _ = select.select([self.fd, self._wake_r], [], [], timeout)
+        if self.fd not in ready:
+            return []
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return []
+
+        events = []
+        offset = 0
+        while offset + _EVENT_HEADER.size <= len(data):
+            wd, mask, _, length = _EVENT_HEADER.unpack_from(data, offset)
+            offset += _EVENT_HEADER.size
+            name = data[offset : offset + length].rstrip(b"\0")
+            offset += length
+            events.append((wd, mask, os.fsdecode(name)))
+        return events
+
+    def wake(self):
+        os.write(self._wake_w, b"\0")
+
+    def close(self):
+        for fd in (self.fd, self._wake_r, self._wake_w):
+            os.close(fd)
+
+
+class LabWatcher:
+    """
+    Keeps an Experiment up to date with its lab directory and job store.
+
+    Each check refreshes the experiment (see Experiment.refresh()) and looks for
+    new 'repx/SUCCESS' markers in the store of a LocalCacheResolver. Callbacks
+    receive the set of IDs of the jobs that changed or completed since the
+    previous check.
+
+    Only store directories named after jobs of the experiment are tracked
+    until they complete; others are set aside, and tracked once the job shows
+    up in the lab.
+
+    Checks run either through poll(), or from a background thread started with
+    start(). The thread waits for inotify events where available and otherwise
+    polls file signatures every 'interval' seconds. In both cases, the
+    experiment is updated and callbacks are run from that thread.
+
+    Experiments are not thread-safe. Each check, callbacks included, runs while
+    holding 'lock', which other threads must also hold while they use the
+    experiment of a started watcher.
+    """
+
+    def __init__(
+        self,
+        experiment: "Experiment",
+        callback: Optional[Callable[[Set[str]], None]] = None,
+        interval: float = 1.0,
+        backend: str = "auto",
+    ):
+        """
+        Args:
+            experiment: The experiment to keep up to date.
+            callback: Optional callable receiving the set of changed job IDs.
+            interval: Seconds between checks when polling. With inotify, the
+                longest time the thread waits for events before checking whether
+                new paths need watching.
+            backend: 'inotify', 'poll', or 'auto' to use inotify where available.
+        """
+        if backend not in WATCH_BACKENDS:
+            raise ValueError(
+                f"Unknown watch backend '{backend}'. "
+                f"Choose one of: {', '.join(WATCH_BACKENDS)}."
+            )
+        self.experiment = experiment
+        self.interval = interval
+        self.completed: Set[str] = set()
+        self._callbacks: List[Callable[[Set[str]], None]] = []
+        if callback is not None:
+            self._callbacks.append(callback)
+
+        resolver = experiment.resolver
+        self._store = (
+            resolver.cache_dir if isinstance(resolver, LocalCacheResolver) else None
+        )
+        self._store_signature: Optional[int] = None
+        self._seen_dirs: Set[str] = set()
+        self._running_jobs: Set[str] = set()
+        self._other_dirs: Set[str] = set()
+        self.lock = threading.RLock()
+
+        self._inotify = _Inotify.create() if backend != "poll" else None
+        if backend == "inotify" and self._inotify is None:
+            raise OSError("inotify is not available on this platform.")
+        self._watches: Dict[str, int] = {}
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+        # Jobs that already completed are not reported, including those of the
+        # lab that are not loaded yet.
+        self._check_markers()
+        self.completed.update(
+            job_id for job_id in self._other_dirs if self._succeeded(job_id)
+        )
+        self._other_dirs -= self.completed
+
+    @property
+    def backend(self) -> str:
+        return "poll" if self._inotify is None else "inotify"
+
+    def add_callback(self, callback: Callable[[Set[str]], None]):
+        self._callbacks.append(callback)
+
+    def poll(self) -> Set[str]:
+        """
+        Runs a single check, notifies the callbacks if anything changed, and
+        returns the changed job IDs.
+        """
+        with self.lock:
+            changed = self.experiment.refresh()
+            known_jobs = self.experiment._metadata["jobs"]
+            changed.update(
+                job_id for job_id in self._check_markers() if job_id in known_jobs
+            )
+            if changed:
+                logger.debug(f"Watcher detected {len(changed)} changed job(s).")
+                for callback in self._callbacks:
+                    callback(changed)
+            return changed
+
+    def start(self) -> "LabWatcher":
+        """Starts checking for changes from a daemon thread."""
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(
+                target=self._run, name="repx-lab-watcher", daemon=True
+            )
+            self._thread.start()
+        return self
+
+    def stop(self):
+        """Stops the background thread and releases inotify resources."""
+        self._stop.set()
+        if self._inotify is not None:
+            self._inotify.wake()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        if self._inotify is not None:
+            self._inotify.close()
+            self._inotify = None
+            self._watches.clear()
+
+    def __enter__(self) -> "LabWatcher":
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def _run(self):
+        while not self._stop.is_set():
+            if self._inotify is None:
+                self._safe_poll()
+                self._stop.wait(self.interval)
+                continue
+
+            # Adding watches can race with the changes they should report, so
+            # every change to the watched set is followed by another check.
+            while self._sync_watches() and not self._stop.is_set():
+                self._safe_poll()
+            if self._inotify.read(self.interval):
+                self._safe_poll()
+
+    def _safe_poll(self):
+        try:
+            self.poll()
+        except Exception as e:
+            # Files caught mid-write are picked up again by the next check.
+            logger.warning(f"Lab watcher check failed: {e}")
+
+    def _check_markers(self) -> Set[str]:
+        """Returns the jobs whose SUCCESS marker appeared since the last check."""
+        if self._store is None:
+            return set()
+        try:
+            signature = os.stat(self._store).st_mtime_ns
+        except OSError:
+            return set()
+
+        if signature != self._store_signature:
+            self._store_signature = signature
+            with os.scandir(self._store) as entries:
+                new_dirs = {
+                    entry.name
+                    for entry in entries
+                    if entry.name not in self._seen_dirs and entry.is_dir()
+                }
+            self._seen_dirs.update(new_dirs)
+            self._other_dirs.update(new_dirs)
+
+        # Directories of jobs outside the lab are only tracked once the job is
+        # added to it, so that a shared store does not cost a stat and two
+        # watches per directory.
+        known_jobs = self.experiment._metadata["jobs"]
+        lab_dirs = {job_id for job_id in self._other_dirs if job_id in known_jobs}
+        self._other_dirs -= lab_dirs
+        self._running_jobs |= lab_dirs
+
+        completed = {job_id for job_id in self._running_jobs if self._succeeded(job_id)}
+        self._running_jobs -= completed
+        self.completed |= completed
+        return completed
+
+    def _succeeded(self, job_id: str) -> bool:
+        return os.path.exists(os.path.join(self._store, job_id, "repx", "SUCCESS"))
+
+    def _watched_paths(self) -> Dict[str, int]:
+        exp = self.experiment
+        metadata_files = [exp._manifest_path, exp._root_metadata_path]
+        metadata_files.extend(Path(path) for path in exp._run_paths)
+        metadata_files.extend(exp._pending_runs)
+        paths = {
+            str(path.parent): _METADATA_EVENTS
+            for path in metadata_files
+            if path is not None
+        }
+        if self._store is not None:
+            paths[str(self._store)] = _STORE_EVENTS
+            for job_id in self._running_jobs:
+                job_dir = os.path.join(self._store, job_id)
+                paths[job_dir] = _STORE_EVENTS
+                paths[os.path.join(job_dir, "repx")] = _STORE_EVENTS
+        return paths
+
+    def _sync_watches(self) -> bool:
+        """Updates the inotify watches; returns True if any watch was added."""
+        paths = self._watched_paths()
+        for path in list(self._watches):
+            if path not in paths:
+                self._inotify.rm_watch(self._watches.pop(path))
+
+        added = False
+        for path, mask in paths.items():
+            if path not in self._watches:
+                wd = self._inotify.add_watch(path, mask)
+                if wd is not None:
+                    self._watches[path] = wd
+                    added = True
+        return added
@@ -2,8 +2,10 @@ import json
 import subprocess
 import sys
 from pathlib import Path
+from types import SimpleNamespace
 
 
+from repx_py.cli import debug_runner
 from repx_py.models import Experiment
 
 
@@ -86,3 +88,43 @@ def test_cli_debug_runner_simple_stage(lab_path: Path, tmp_path: Path):
     assert content == expected_content, (
         f"Expected output {expected_content}, but got '{content}'."
     )
+
+
+def test_cli_debug_runner_unknown_job(lab_path: Path, tmp_path: Path):
+    """The debug runner reports job IDs that match no job instead of crashing."""
+    command = [
+        sys.executable,
+        "-m",
+        "repx_py.cli.debug_runner",
+        "--lab",
+        str(lab_path),
+        "--job",
+        "no-such-job",
+        "--job-cache",
+        str(tmp_path / "repx-cache"),
+    ]
+
+    result = subprocess.run(command, capture_output=True, text=True, check=False)
+
+    assert result.returncode == 1
+    assert "Job ID 'no-such-job' not found." in result.stderr
+
+
+def test_debug_runner_runs_shared_dependencies_first(tmp_path: Path, monkeypatch):
+    """Jobs run after all of their dependencies, even ones shared by branches."""
+    jobs = {name: SimpleNamespace(id=name, dependencies=[]) for name in "JABCD"}
+    jobs["J"].dependencies = [jobs["A"], jobs["C"], jobs["B"]]
+    jobs["A"].dependencies = [jobs["C"]]
+    jobs["B"].dependencies = [jobs["D"], jobs["A"]]
+    jobs["C"].dependencies = [jobs["D"]]
+
+    order = []
+    monkeypatch.setattr(
+        debug_runner, "execute_job", lambda job, lab, cache: order.append(job.id)
+    )
+    debug_runner.ensure_job_is_run(jobs["J"], None, tmp_path, tmp_path)
+
+    assert sorted(order) == sorted(jobs)
+    for job in jobs.values():
+        for dep in job.dependencies:
+            assert order.index(dep.id) < order.index(job.id)
@@ -0,0 +1,77 @@
+import io
+import json
+import math
+import shutil
+
+import pytest
+
+from repx_py import codec
+from repx_py.models import Experiment
+
+DOCUMENT = {"b": [1, 2.5, None, True], "a": {"name": "stage-A", "n": -3}}
+
+
+@pytest.mark.parametrize("backend", codec.available_backends())
+def test_codec_round_trip(backend):
+    """Tests that every installed backend decodes and encodes consistently."""
+    c = codec.get_codec(backend)
+    text = codec.get_codec("json").dumps(DOCUMENT, indent=2)
+    assert c.loads(text) == DOCUMENT
+    assert c.load(io.BytesIO(text.encode())) == DOCUMENT
+    assert c.dumps(DOCUMENT, indent=2) == text
+    assert list(c.loads(c.dumps(DOCUMENT, sort_keys=True))) == ["a", "b"]
+
+
+def test_codec_backend_selection(monkeypatch):
+    """Tests that the environment variable pins the backend and bad names fail."""
+    monkeypatch.delenv(codec.BACKEND_ENV_VAR, raising=False)
+    assert codec.get_codec().name == "json"
+    assert codec.get_codec("auto").name == codec.available_backends()[0]
+    monkeypatch.setenv(codec.BACKEND_ENV_VAR, "json")
+    assert codec.get_codec().name == "json"
+    with pytest.raises(ValueError):
+        codec.get_codec("yaml")
+
+
+def test_experiment_json_backend(experiment: Experiment):
+    """Tests that pinning a backend on an Experiment yields the same metadata."""
+    for backend in codec.available_backends():
+        pinned = Experiment(experiment.path, json_backend=backend)
+        assert pinned._codec.name == backend
+        assert pinned._metadata == experiment._metadata
+
+
+def test_orjson_backend_loads_nan(lab_path, tmp_path, monkeypatch):
+    """Tests that a lab holding NaN loads with orjson as with the standard library."""
+    pytest.importorskip("orjson")
+    monkeypatch.delenv(codec.BACKEND_ENV_VAR, raising=False)
+    lab_copy = tmp_path / "lab"
+    shutil.copytree(lab_path, lab_copy, symlinks=True)
+    exp = Experiment(lab_copy)
+    run_file = next(iter(exp._run_paths))
+    with open(run_file) as f:
+        run_data = json.load(f)
+    job_id = next(iter(run_data["jobs"]))
+    run_data["jobs"][job_id].setdefault("params", {})["threshold"] = float("nan")
+    with open(run_file, "w") as f:
+        json.dump(run_data, f)
+
+    for backend in ("orjson", "json"):
+        loaded = Experiment(lab_copy, json_backend=backend)
+        assert math.isnan(loaded.get_job(job_id).params["threshold"])
+    assert codec.dumps({"x": float("nan")}) == '{"x": NaN}'
+
+
+def test_dumps_uses_selected_backend(monkeypatch):
+    """Tests that module-level encoding follows the backend selection."""
+    monkeypatch.delenv(codec.BACKEND_ENV_VAR, raising=False)
+    assert codec.dumps({"name": "é"}) == json.dumps({"name": "é"})
+    pytest.importorskip("orjson")
+    monkeypatch.setenv(codec.BACKEND_ENV_VAR, "orjson")
+    assert codec.dumps({"name": "é"}) == '{"name":"é"}'
+    assert codec.dumps(DOCUMENT, indent=2, sort_keys=True) == json.dumps(
+        DOCUMENT, indent=2, sort_keys=True
+    )
+    stream = io.StringIO()
+    codec.dump(DOCUMENT, stream, indent=3)
+    assert stream.getvalue() == json.dumps(DOCUMENT, indent=3)
@@ -0,0 +1,67 @@
+import io
+import json
+
+import pytest
+
+from repx_py import jsonstream
+from repx_py.models import Experiment
+
+
+def test_streaming_decode_matches_json_load():
+    """Tests that streaming decoding agrees with json.load across chunk boundaries."""
+    document = {
+        "type": "run",
+        "name": "r",
+        "count": 12345678,
+        "jobs": {
+            f"job-{i}": {"params": {"x": i * 1.5, "s": "é\"\\" * i}, "ok": i % 2 == 0}
+            for i in range(50)
+        },
+        "tail": [None, True, -1e-7],
+    }
+    text = json.dumps(document, indent=1)
+    for chunk_size in (1, 7, 64, 1 << 20):
+        assert jsonstream.load(io.StringIO(text), chunk_size=chunk_size) == document
+
+    seen = []
+    jsonstream.load(
+        io.StringIO(text), value_hook=lambda k, v: seen.append(k) or v, chunk_size=5
+    )
+    assert seen == list(document["jobs"])
+
+    with pytest.raises(json.JSONDecodeError):
+        jsonstream.load(io.StringIO(text[:-3]), chunk_size=16)
+
+
+class _SplitStream(io.StringIO):
+    """A text stream whose first read stops at a given offset."""
+
+    def __init__(self, text: str, split: int):
+        super().__init__(text)
+        self.split = split
+
+    def read(self, size=-1):
+        if self.split is not None:
+            size, self.split = self.split, None
+        return super().read(size)
+
+
+def test_streaming_decode_at_every_split():
+    """Tests that values cut by a read at any offset decode like whole ones."""
+    document = {
+        "jobs": {"a": {"t": 1712345678.5, "n": [0, 1e5, True, None]}, "b": 2.5e-10},
+        "time": 1712345678.5,
+        "e": -2.5e-10,
+        "big": 12345678901234567890,
+        "s": "x\u00e9\"y",
+    }
+    text = json.dumps(document)
+    for split in range(1, len(text)):
+        stream = _SplitStream(text, split)
+        assert jsonstream.load(stream, chunk_size=1 << 20) == document
+
+
+def test_experiment_streaming_decode(lab_path):
+    """Tests that an Experiment loads identically with streaming forced on."""
+    streamed = Experiment(lab_path, stream_threshold=0)
+    assert streamed._metadata == Experiment(lab_path, stream_threshold=None)._metadata
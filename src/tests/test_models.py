@@ -1,6 +1,21 @@
+import json
+import shutil
+import sys
+import threading
+from collections.abc import Mapping
+
+import numpy as np
 import pandas as pd
+import pytest
 
+from repx_py.federation import FederatedExperiment
+from repx_py import jobtable
+from repx_py.jobtable import JobTable
+from repx_py.params import MAX_LAYER_DEPTH, LayeredParams
+from repx_py.query import PrefixIndex, Q, value_mask
 from repx_py.models import (
+    AmbiguousJobIDError,
+    CircularDependencyError,
     Experiment,
     JobCollection,
     JobView,
@@ -60,7 +75,7 @@ def test_job_view_properties(experiment: Experiment):
     total_sum_job = experiment.jobs().filter(name__startswith="stage-E-total-sum")[0]
 
     assert isinstance(total_sum_job.params, dict)
-    assert isinstance(total_sum_job.effective_params, dict)
+    assert isinstance(total_sum_job.effective_params, Mapping)
     assert total_sum_job.executable_path.endswith("/bin/stage-E-total-sum")
     assert len(total_sum_job.input_mappings) > 0
     assert total_sum_job.outputs["data.total_sum"] == "$out/total_sum.txt"
@@ -93,3 +108,807 @@ def test_resolvers(experiment: Experiment, tmp_path):
 
     final_path = job_view.get_output_path("data_a")
     assert str(final_path) == "/nix/store/some-hash-result/numbers.txt"
+
+
+def test_experiment_snapshot(lab_path, tmp_path):
+    """Tests that a warm snapshot reproduces the cold-loaded experiment."""
+    cold = Experiment(lab_path, snapshot=tmp_path)
+    assert len(list(tmp_path.glob("*.pickle"))) == 1
+
+    warm = Experiment(lab_path, snapshot=tmp_path)
+    assert warm._metadata == cold._metadata
+    assert warm.effective_params == cold.effective_params
+    assert sorted(warm.runs()) == sorted(cold.runs())
+
+
+def test_experiment_parallel_loading(experiment: Experiment):
+    """Tests that concurrent run loading merges runs exactly like sequential loading."""
+    parallel = Experiment(experiment.path, load_workers=4)
+    assert list(parallel.runs()) == list(experiment.runs())
+    assert list(parallel._metadata["jobs"]) == list(experiment._metadata["jobs"])
+    assert parallel.effective_params == experiment.effective_params
+
+
+def test_experiment_lazy_loading(experiment: Experiment):
+    """Tests that a lazy Experiment loads runs on demand and agrees with eager loading."""
+    lazy = Experiment(experiment.path, lazy=True)
+    assert lazy._metadata["runs"] == {}
+
+    sim_jobs = lazy.jobs(run="simulation-run")
+    assert "simulation-run" in lazy._metadata["runs"]
+    assert sorted(j.id for j in sim_jobs) == sorted(
+        experiment.runs()["simulation-run"]["jobs"]
+    )
+
+    job = lazy.jobs(run="analysis-run")[0]
+    assert job.effective_params == experiment.get_job(job.id).effective_params
+    assert lazy.get_run_for_job(job.id)[0] == "analysis-run"
+    assert dict(lazy.effective_params) == dict(experiment.effective_params)
+
+
+def test_lazy_loading_job_redefined_by_later_run(lab_path, tmp_path):
+    """Tests that a job redefined by a later run is updated once that run loads."""
+    lab_copy = tmp_path / "lab"
+    shutil.copytree(lab_path, lab_copy, symlinks=True)
+    first_path, last_path = list(Experiment(lab_copy)._run_paths)
+    with open(first_path) as f:
+        first_jobs = json.load(f)["jobs"]
+    with open(last_path) as f:
+        last_run = json.load(f)
+    job_id = next(iter(first_jobs))
+    job_data = first_jobs[job_id]
+    last_run["jobs"][job_id] = {**job_data, "params": {**job_data["params"], "v": 2}}
+    with open(last_path, "w") as f:
+        json.dump(last_run, f)
+
+    eager = Experiment(lab_copy)
+    lazy = Experiment(lab_copy, lazy=True)
+    descendants = eager.descendants(job_id)._job_ids
+    assert any(dep_id in first_jobs for dep_id in descendants)
+    for dep_id in [job_id, *descendants]:
+        if dep_id in first_jobs:
+            assert "v" not in lazy.get_job(dep_id).effective_params
+    assert lazy._pending_runs
+
+    assert lazy.get_run_for_job(job_id) == eager.get_run_for_job(job_id)
+    for dep_id in [job_id, *descendants]:
+        assert lazy.get_job(dep_id).effective_params["v"] == 2
+        assert lazy.get_job(dep_id).params == eager.get_job(dep_id).params
+    assert len(lazy.jobs().filter(effective_params__v=2)) == len(descendants) + 1
+
+
+def test_job_table_round_trip(experiment: Experiment):
+    """Tests that the compact job table rebuilds every job record exactly."""
+    raw_jobs = {}
+    for path in experiment._source_files:
+        with open(path) as f:
+            data = json.load(f)
+        if data.get("type") == "run":
+            raw_jobs.update(data.get("jobs", {}))
+
+    table = experiment._metadata["jobs"]
+    assert list(table) == list(raw_jobs)
+    for job_id, raw in raw_jobs.items():
+        assert table[job_id] == raw
+        index = table.index_of(job_id)
+        assert table.params[index] == raw.get("params", {})
+
+        job = experiment.get_job(job_id)
+        sg = raw.get("stage_type") == "scatter-gather"
+        executables = raw.get("executables", {})
+        assert job.input_mappings == executables["scatter" if sg else "main"].get(
+            "inputs", []
+        )
+        assert job.outputs == executables["gather" if sg else "main"].get(
+            "outputs", {}
+        )
+
+
+def test_experiment_refresh(lab_path, tmp_path):
+    """Tests that refresh() applies on-disk changes like a fresh load would."""
+    lab_copy = tmp_path / "lab"
+    shutil.copytree(lab_path, lab_copy, symlinks=True)
+    exp = Experiment(lab_copy)
+    assert exp.refresh() == set()
+
+    run_file = next(
+        path
+        for path in exp._run_paths
+        if any(
+            job.get("params")
+            for job in exp.runs()[exp._run_paths[path]]["jobs"].values()
+        )
+    )
+    with open(run_file) as f:
+        run_data = json.load(f)
+    job_id, job_data = next(
+        (job_id, job_data)
+        for job_id, job_data in run_data["jobs"].items()
+        if job_data.get("params")
+    )
+    old_view = exp.get_job(job_id)
+    job_data["params"]["refresh_marker"] = 1
+    with open(run_file, "w") as f:
+        json.dump(run_data, f)
+
+    changed = exp.refresh()
+    assert job_id in changed
+    assert exp.get_job(job_id) is not old_view
+    assert exp.get_job(job_id).params["refresh_marker"] == 1
+    for child_id in changed - {job_id}:
+        assert exp.effective_params[child_id].get("refresh_marker") == 1
+    assert exp.effective_params == Experiment(lab_copy).effective_params
+    assert exp.refresh() == set()
+
+    del run_data["jobs"][job_id]
+    with open(run_file, "w") as f:
+        json.dump(run_data, f)
+
+    assert job_id in exp.refresh()
+    fresh = Experiment(lab_copy)
+    assert job_id not in exp._metadata["jobs"]
+    assert dict(exp._metadata["jobs"]) == dict(fresh._metadata["jobs"])
+    assert exp.effective_params == fresh.effective_params
+
+
+def test_lab_watcher(lab_path, tmp_path):
+    """Tests that a watcher reports new SUCCESS markers and metadata changes."""
+    lab_copy = tmp_path / "lab"
+    shutil.copytree(lab_path, lab_copy, symlinks=True)
+    store = tmp_path / "store"
+    store.mkdir()
+    exp = Experiment(lab_copy, resolver=LocalCacheResolver(store))
+    first_id, second_id = list(exp.jobs())[:2]
+    first_id, second_id = first_id.id, second_id.id
+    (store / first_id / "repx").mkdir(parents=True)
+    (store / first_id / "repx" / "SUCCESS").touch()
+
+    seen = []
+    watcher = exp.watch(seen.append, backend="poll", start=False)
+    assert watcher.completed == {first_id}
+    assert watcher.poll() == set()
+
+    (store / second_id / "repx").mkdir(parents=True)
+    (store / "job-of-another-lab" / "repx").mkdir(parents=True)
+    assert watcher.poll() == set()
+    assert watcher._running_jobs == {second_id}
+    assert not any("job-of-another-lab" in path for path in watcher._watched_paths())
+    (store / second_id / "repx" / "SUCCESS").touch()
+    assert watcher.poll() == {second_id}
+    assert seen == [{second_id}]
+
+    run_file = next(iter(exp._run_paths))
+    with open(run_file) as f:
+        run_data = json.load(f)
+    job_id = next(iter(run_data["jobs"]))
+    run_data["jobs"][job_id]["params"] = {"watch_marker": 1}
+
+    changed = threading.Event()
+    with exp.watch(lambda job_ids: changed.set(), interval=0.05):
+        with open(run_file, "w") as f:
+            json.dump(run_data, f)
+        assert changed.wait(5)
+    assert exp.get_job(job_id).params == {"watch_marker": 1}
+
+
+def test_federated_experiment(lab_path, tmp_path, experiment: Experiment):
+    """Tests that labs sharing jobs are merged without duplicating them."""
+    stores = {"first": tmp_path / "first", "second": tmp_path / "second"}
+    fed = FederatedExperiment(
+        {"first": lab_path, "second": lab_path},
+        resolvers={label: LocalCacheResolver(store) for label, store in stores.items()},
+    )
+
+    assert len(fed.jobs()) == len(experiment.jobs())
+    assert sorted(fed.runs()) == sorted(
+        f"{label}/{run}" for label in stores for run in experiment.runs()
+    )
+    assert fed.effective_params == experiment.effective_params
+
+    job = fed.jobs()[0]
+    assert fed.labs_for_job(job.id) == ("first", "second")
+    out_file = stores["second"] / job.id / "out" / "result.txt"
+    out_file.parent.mkdir(parents=True)
+    out_file.touch()
+    assert fed.resolver.resolve_path(job, "result.txt") == out_file
+    assert fed.resolver.resolve_path(job, "other.txt") == (
+        stores["first"] / job.id / "out" / "other.txt"
+    )
+
+
+def _chain_metadata(job_ids, closing_id=None):
+    jobs = {}
+    for i, job_id in enumerate(job_ids):
+        dep_id = job_ids[i - 1] if i else closing_id
+        inputs = [{"job_id": dep_id}] if dep_id else []
+        jobs[job_id] = {
+            "params": {f"p{i % 3}": i},
+            "executables": {"main": {"inputs": inputs}},
+        }
+    return {"root": {}, "runs": {"run": {"name": "run", "jobs": jobs}}, "jobs": jobs}
+
+
+def test_effective_params_deep_chain():
+    """Tests that dependency chains deeper than the recursion limit resolve."""
+    job_ids = [f"job-{i}" for i in range(5 * sys.getrecursionlimit())]
+    exp = Experiment(_preloaded_metadata=_chain_metadata(job_ids))
+    assert exp.effective_params[job_ids[-1]] == {
+        f"p{i % 3}": i for i in range(len(job_ids) - 3, len(job_ids))
+    }
+
+
+def test_effective_params_cycle():
+    """Tests that cycles are reported with the jobs involved."""
+    metadata = _chain_metadata(["a", "b", "c"], closing_id="c")
+    with pytest.raises(CircularDependencyError) as excinfo:
+        Experiment(_preloaded_metadata=metadata)
+    assert excinfo.value.cycle == ["a", "c", "b", "a"]
+    assert isinstance(excinfo.value, RecursionError)
+
+
+def test_layered_params_merge_order():
+    """Tests that shared layers behave like dicts merged in dependency order."""
+    root = LayeredParams.build({"a": 1, "b": 1}, ())
+    left = LayeredParams.build({"b": 2, "c": 2}, [root])
+    right = LayeredParams.build({"d": 3}, [root])
+    job = LayeredParams.build({"e": 4}, [left, right])
+
+    expected = {}
+    for layer in ({**root}, {**root, "b": 2, "c": 2}, {**root, "d": 3}, {"e": 4}):
+        expected.update(layer)
+    assert job.to_dict() == expected
+    assert list(job) == list(expected)
+    assert job["b"] == 1 and "c" in job and "z" not in job
+    assert LayeredParams.build({}, [left]) is left
+    assert job == expected and expected == job
+
+
+def test_layered_params_deep_dag_flattening():
+    """Tests that layers flattened past MAX_LAYER_DEPTH keep the merge order."""
+    layers = [LayeredParams.build({"a": 0}, ())]
+    dicts = [{"a": 0}]
+    for i in range(1, 80):
+        parents = [i - 1, max(i - 3, 0)]
+        own = {"a": i, f"p{i % 5}": i} if i % 4 else {}
+        layers.append(LayeredParams.build(own, [layers[j] for j in parents]))
+        expected = {}
+        for j in parents:
+            expected.update(dicts[j])
+        expected.update(own)
+        dicts.append(expected)
+
+    assert max(layer._depth for layer in layers) <= MAX_LAYER_DEPTH
+    for layer, expected in zip(layers, dicts):
+        assert list(layer.to_dict().items()) == list(expected.items())
+
+
+def test_experiment_lazy_params(experiment: Experiment):
+    """Tests that effective params are resolved per job, along its upstream chain."""
+    lazy = Experiment(experiment.path, lazy_params=True)
+    assert lazy._effective_params_cache == {}
+
+    job = lazy.jobs().filter(name__startswith="stage-E")[0]
+    assert job.effective_params == experiment.get_job(job.id).effective_params
+    resolved = set(lazy._effective_params_cache)
+    assert job.id in resolved
+    assert {dep.id for dep in job.dependencies} <= resolved
+    assert len(resolved) < len(experiment.jobs())
+
+    assert lazy.effective_params == experiment.effective_params
+
+
+def test_job_table_dependency_index():
+    """Tests that dependency indices resolve references to jobs added later."""
+    table = JobTable()
+    table.add("b", {"executables": {"main": {"inputs": [{"job_id": "a"}] * 2}}})
+    table.add("c", {"executables": {"main": {"inputs": [{"job_id": "b"}]}}})
+    assert table.parents[table.index_of("b")] == (-1, -1)
+
+    table.add("a", {"params": {"x": 1}})
+    a, b, c = map(table.index_of, "abc")
+    assert table.parents[b] == (a, a)
+    assert table.parent_indices(b) == [a]
+    assert table.child_indices(a).tolist() == [b]
+    assert table.child_indices(b).tolist() == [c]
+    assert table.child_indices(c).tolist() == []
+
+
+def test_job_table_pools_are_released(lab_path):
+    """Tests that deduplication pools are dropped after loading, and rebuilt."""
+    for exp in (Experiment(lab_path), Experiment(lab_path, lazy=True)):
+        exp.jobs()
+        assert exp._metadata["jobs"]._pools is None
+
+    table = JobTable()
+    table.add("a", {"params": {"x": [1]}})
+    table.release_pools()
+    table.add("b", {"params": {"x": [1]}})
+    table.add("c", {"params": {"x": [1.0]}})
+    assert table._pools is not None
+    assert table.params[1] is table.params[0]
+    assert table.params[2] is not table.params[0]
+
+
+def test_empty_job_fields_are_not_shared():
+    """Tests that mutating a job's empty params, outputs or inputs leaves others be."""
+    jobs = {job_id: {"executables": {"main": {}}} for job_id in ("a", "b")}
+    metadata = {"root": {}, "runs": {"run": {"name": "run", "jobs": jobs}}}
+    exp = Experiment(_preloaded_metadata={**metadata, "jobs": jobs})
+    a, b = exp.get_job("a"), exp.get_job("b")
+
+    a.params["x"] = 1
+    a.outputs["out"] = "out.csv"
+    a.input_mappings.append({"job_id": "b"})
+    assert b.params == {} and b.outputs == {} and b.input_mappings == []
+    assert exp._metadata["jobs"].record(1) == {"executables": {"main": {}}}
+
+
+def test_job_table_closure_cache_is_bounded_by_size(monkeypatch):
+    """Tests that cached closures are evicted once over the byte budget."""
+    monkeypatch.setattr(jobtable, "_CLOSURE_CACHE_BYTES", 64)
+    table = JobTable()
+    table.add("j0", {})
+    for i in range(1, 40):
+        inputs = [{"job_id": f"j{i - 1}"}]
+        table.add(f"j{i}", {"executables": {"main": {"inputs": inputs}}})
+    for i in range(40):
+        assert table.closure([i], upstream=True).tolist() == list(range(i))
+        assert table._closure_bytes <= 64
+    assert table.closure([39], upstream=False).tolist() == []
+    cached = [table._graph[key] for key in table._closures]
+    assert sum(array.nbytes for array in cached) == table._closure_bytes
+
+
+def test_job_dependencies_match_input_mappings(experiment: Experiment):
+    """Tests that dependencies list the jobs referenced by the input mappings."""
+    for job in experiment.jobs():
+        expected = {
+            m["job_id"]
+            for m in job.input_mappings
+            if m.get("job_id") and m["job_id"] != "self"
+        }
+        assert {dep.id for dep in job.dependencies} == expected
+
+
+def test_job_dependents_and_consumers(experiment: Experiment):
+    """Tests the reverse dependency lookups against a scan of input mappings."""
+    jobs = experiment.jobs()
+    for job in jobs:
+        expected = [
+            other.id
+            for other in jobs
+            if any(m.get("job_id") == job.id for m in other.input_mappings)
+        ]
+        assert [dep.id for dep in job.dependents] == expected
+
+        for output_key in job.outputs:
+            expected = [
+                other.id
+                for other in jobs
+                if any(
+                    m.get("job_id") == job.id and m.get("source_output") == output_key
+                    for m in other.input_mappings
+                )
+            ]
+            assert [dep.id for dep in job.consumers(output_key)] == expected
+
+    with pytest.raises(KeyError):
+        jobs[0].consumers("no-such-output")
+
+
+def test_job_ancestors_and_descendants(experiment: Experiment):
+    """Tests closure queries against a walk over dependencies."""
+
+    def walk(job, step):
+        seen = set()
+        stack = list(step(job))
+        while stack:
+            current = stack.pop()
+            if current.id not in seen:
+                seen.add(current.id)
+                stack.extend(step(current))
+        return seen
+
+    jobs = experiment.jobs()
+    for job in jobs:
+        ancestors = experiment.ancestors(job)
+        assert {j.id for j in ancestors} == walk(job, lambda j: j.dependencies)
+        assert experiment.ancestors(job.id)._job_ids == ancestors._job_ids
+        assert {j.id for j in experiment.descendants(job)} == walk(
+            job, lambda j: j.dependents
+        )
+
+    sinks = jobs.filter(lambda j: not j.dependents)
+    assert {j.id for j in sinks.ancestors()} == {
+        j.id for j in jobs if j.dependents
+    }
+    assert len(sinks.descendants()) == 0
+    with pytest.raises(KeyError):
+        experiment.ancestors("no-such-job")
+
+
+def test_dependency_graph_export(experiment: Experiment):
+    """Tests that the CSR export lists every input mapping to a known job."""
+    graph = experiment.dependency_graph()
+    assert len(graph.indptr) == len(graph.job_ids) + 1
+    assert len(graph.indices) == graph.indptr[-1]
+
+    for job in experiment.jobs():
+        index = graph.job_index[job.id]
+        edges = range(graph.indptr[index], graph.indptr[index + 1])
+        exported = [
+            (
+                graph.job_ids[graph.indices[edge]],
+                graph.source_output_names[graph.source_output[edge]],
+                graph.target_input_names[graph.target_input[edge]],
+            )
+            for edge in edges
+        ]
+        assert exported == [
+            (m["job_id"], m["source_output"], m["target_input"])
+            for m in job.input_mappings
+            if m.get("job_id") and m["job_id"] != "self"
+        ]
+
+
+def test_filter_by_params(experiment: Experiment):
+    """Tests indexed parameter lookups against a scan of the jobs."""
+    jobs = experiment.jobs()
+    for field in ("params", "effective_params"):
+        values = {}
+        for job in jobs:
+            for key, value in getattr(job, field).items():
+                values.setdefault(key, []).append(value)
+
+        for key, key_values in values.items():
+            value = key_values[0]
+            expected = [
+                job.id for job in jobs if getattr(job, field).get(key, object()) == value
+            ]
+            found = jobs.filter(**{f"{field}__{key}": value})
+            assert found._job_ids == expected
+
+            expected = [
+                job.id
+                for job in jobs
+                if getattr(job, field).get(key, object()) in key_values[:2]
+            ]
+            found = jobs.filter(**{f"{field}__{key}__in": key_values[:2]})
+            assert found._job_ids == expected
+
+    assert len(jobs.filter(params__no_such_param=1)) == 0
+
+    for job in jobs:
+        for field in ("params", "effective_params"):
+            mapping = dict(getattr(job, field))
+            expected = [other.id for other in jobs if getattr(other, field) == mapping]
+            assert job.id in expected
+            assert jobs.filter(**{field: mapping})._job_ids == expected
+    stage = jobs.filter(name__startswith="stage-A")
+    seed = stage[0].effective_params["seed"]
+    assert all(
+        job.name.startswith("stage-A") and job.effective_params["seed"] == seed
+        for job in jobs.filter(name__startswith="stage-A", effective_params__seed=seed)
+    )
+
+
+def test_filter_operators(experiment: Experiment):
+    """Tests the filter operators against plain Python checks."""
+    jobs = experiment.jobs()
+    seeds = sorted(
+        {job.effective_params["seed"] for job in jobs if "seed" in job.effective_params}
+    )
+    low, high = seeds[0], seeds[-1]
+
+    def ids(check):
+        return [job.id for job in jobs if check(job)]
+
+    def seed(job):
+        return job.effective_params.get("seed")
+
+    assert jobs.filter(effective_params__seed__gt=low)._job_ids == ids(
+        lambda j: seed(j) is not None and seed(j) > low
+    )
+    assert jobs.filter(effective_params__seed__le=low)._job_ids == ids(
+        lambda j: seed(j) is not None and seed(j) <= low
+    )
+    assert jobs.filter(effective_params__seed__range=(low, high))._job_ids == ids(
+        lambda j: seed(j) is not None
+    )
+    assert jobs.filter(effective_params__seed__isnull=True)._job_ids == ids(
+        lambda j: seed(j) is None
+    )
+    assert jobs.filter(name__regex=r"^stage-[AB]")._job_ids == ids(
+        lambda j: j.name.startswith(("stage-A", "stage-B"))
+    )
+    assert jobs.filter(name__in=["stage-A-producer"])._job_ids == ids(
+        lambda j: j.name == "stage-A-producer"
+    )
+    assert jobs.filter(stage_type="simple", name__lt="stage-B")._job_ids == ids(
+        lambda j: j.stage_type == "simple" and j.name < "stage-B"
+    )
+
+    with pytest.raises(ValueError):
+        jobs.filter(name__near="stage-A")
+    with pytest.raises(ValueError):
+        jobs.filter(effective_params__seed__range=1)
+
+
+def test_value_mask_compares_large_ints_exactly():
+    """Tests that comparisons on 64-bit and larger ints are not rounded."""
+    seed = 2**62 + 1
+    values = [seed - 1, seed, seed + 1, 2**70, 1.5, "x", None]
+    assert value_mask(values, "gt", seed).tolist() == [
+        False, False, True, True, False, False, False
+    ]
+    assert value_mask(values[:3], "le", seed).tolist() == [True, True, False]
+    assert value_mask(values[:4], "range", (seed, seed)).tolist() == [
+        False, True, False, False
+    ]
+    assert value_mask([2**70, 2**70 + 1], "ge", 2**70 + 1).tolist() == [False, True]
+    assert value_mask([1, 2.5, 4], "lt", 3).tolist() == [True, True, False]
+
+
+def test_filter_q_objects(experiment: Experiment):
+    """Tests combined Q conditions, including lookups checked job by job."""
+    jobs = experiment.jobs()
+    seed = jobs.filter(name__startswith="stage-A")[0].effective_params["seed"]
+
+    query = (
+        Q(effective_params__seed=seed) | Q(name__endswith="consumer")
+    ) & ~Q(stage_type="scatter-gather")
+    assert jobs.filter(query)._job_ids == [
+        job.id
+        for job in jobs
+        if (job.effective_params.get("seed") == seed or job.name.endswith("consumer"))
+        and job.stage_type != "scatter-gather"
+    ]
+
+    # executable_path is not a column, so it is checked on undecided jobs only.
+    query = Q(name__startswith="stage-A") | ~Q(executable_path__isnull=False)
+    assert jobs.filter(query)._job_ids == [
+        job.id
+        for job in jobs
+        if job.name.startswith("stage-A") or job.executable_path is None
+    ]
+
+    assert jobs.filter(~Q(), lambda job: True)._job_ids == []
+    stage_b = jobs.filter(Q(), predicate=lambda job: job.name.startswith("stage-B"))
+    assert stage_b._job_ids == [j.id for j in jobs if j.name.startswith("stage-B")]
+    with pytest.raises(TypeError):
+        jobs.filter("name")
+
+
+def test_lazy_job_collection(experiment: Experiment):
+    """Tests that chained filters run lazily and stop at the jobs needed."""
+    jobs = experiment.jobs()
+    calls = []
+
+    def counted(job):
+        calls.append(job.id)
+        return True
+
+    chained = jobs.filter(counted).filter(name__startswith="stage-")
+    assert calls == []
+
+    first = chained.first()
+    assert first is not None and calls == [first.id]
+    assert chained.exists() and len(calls) == 2
+
+    calls.clear()
+    head = chained[:2]
+    assert len(calls) == 2 and len(head) == 2
+
+    calls.clear()
+    expected = [job.id for job in jobs if job.name.startswith("stage-")]
+    assert chained.count() == len(expected)
+    assert chained._job_ids == expected and len(calls) == len(expected)
+    assert [job.id for job in chained] == expected and len(calls) == len(expected)
+
+    empty = jobs.filter(name="no-such-job")
+    assert empty.first() is None and not empty.exists() and empty.count() == 0
+    with pytest.raises(IndexError):
+        empty[0]
+
+
+def test_job_collection_set_operations(experiment: Experiment):
+    """Tests |, &, - and isin against set operations on job IDs."""
+    jobs = experiment.jobs()
+    order = {job_id: i for i, job_id in enumerate(jobs._job_ids)}
+    left = jobs.filter(name__startswith="stage-A") | jobs.filter(
+        name__startswith="stage-B"
+    )
+    right = jobs.filter(lambda job: len(job.dependencies) > 0)
+
+    def ids(collection):
+        return set(collection._job_ids)
+
+    for result, expected in (
+        (left | right, ids(left) | ids(right)),
+        (left & right, ids(left) & ids(right)),
+        (left - right, ids(left) - ids(right)),
+    ):
+        assert result._job_ids == sorted(expected, key=order.get)
+
+    assert (jobs - jobs).count() == 0
+    assert list(jobs.isin(left)) == [job.id in ids(left) for job in jobs]
+    assert list(jobs.isin(job.id for job in left)) == list(jobs.isin(left))
+    assert jobs[0] in jobs and jobs[0].id in jobs and "no-such-job" not in jobs
+
+    other = Experiment(experiment.path)
+    with pytest.raises(ValueError):
+        jobs | other.jobs()
+    with pytest.raises(ValueError):
+        jobs.isin(other.jobs())
+
+
+def test_job_collection_group_by(experiment: Experiment):
+    """Tests group_by against grouping the jobs one by one."""
+    jobs = experiment.jobs()
+    expected = {}
+    for job in jobs:
+        run_name, _ = experiment.get_run_for_job(job.id)
+        seed = job.effective_params.get("seed")
+        expected.setdefault((run_name, job.name, seed), []).append(job.id)
+
+    grouped = jobs.group_by("run", "name", "effective_params__seed")
+    assert list(grouped) == list(expected)
+    assert {key: group._job_ids for key, group in grouped.items()} == expected
+
+    names = jobs.filter(name__startswith="stage-A").group_by("name")
+    assert all(key == (group[0].name,) for key, group in names.items())
+    assert jobs[:0].group_by("name") == {}
+    with pytest.raises(ValueError):
+        jobs.group_by("no_such_field")
+    with pytest.raises(ValueError):
+        jobs.group_by()
+
+
+def test_group_by_merges_missing_and_none():
+    """Tests that jobs without a parameter group with jobs where it is None."""
+    params = {"a": {}, "b": {"seed": None}, "c": {"seed": 1}, "d": {}}
+    jobs = {
+        job_id: {"params": own, "executables": {"main": {"inputs": []}}}
+        for job_id, own in params.items()
+    }
+    metadata = {"root": {}, "runs": {"run": {"name": "run", "jobs": jobs}}}
+    exp = Experiment(_preloaded_metadata={**metadata, "jobs": jobs})
+
+    grouped = exp.jobs().group_by("params__seed")
+    assert {key: group._job_ids for key, group in grouped.items()} == {
+        (None,): ["a", "b", "d"],
+        (1,): ["c"],
+    }
+    assert list(grouped) == [(None,), (1,)]
+
+
+def test_param_index_keeps_bool_int_and_float_apart():
+    """Tests that equal values of different types are coded apart, in job order."""
+    params = {"a": {"x": True}, "b": {"x": 1}, "c": {"x": 1.0}, "d": {"x": 2}}
+    jobs = {
+        job_id: {"params": own, "executables": {"main": {"inputs": []}}}
+        for job_id, own in params.items()
+    }
+    metadata = {"root": {}, "runs": {"run": {"name": "run", "jobs": jobs}}}
+    exp = Experiment(_preloaded_metadata={**metadata, "jobs": jobs})
+
+    column = exp._param_index("params").column("x")
+    assert column.values == [True, 1, 1.0, 2]
+    assert [type(value) for value in column.values] == [bool, int, float, int]
+    assert exp.jobs().filter(params__x__gt=0)._job_ids == ["b", "c", "d"]
+    assert exp.jobs().filter(params__x=1)._job_ids == ["a", "b", "c"]
+    assert exp.jobs().filter(params__x__in=[1])._job_ids == ["a", "b", "c"]
+
+    grouped = exp.jobs().group_by("params__x")
+    assert {key: group._job_ids for key, group in grouped.items()} == {
+        (True,): ["a", "b", "c"],
+        (2,): ["d"],
+    }
+
+
+def test_group_by_run_without_run_and_after_rename(lab_path, tmp_path):
+    """Tests that jobs outside any run group as None, and renamed runs show."""
+    lab_copy = tmp_path / "lab"
+    shutil.copytree(lab_path, lab_copy, symlinks=True)
+    exp = Experiment(lab_copy)
+    jobs = exp.jobs()
+    detached = jobs[0].id
+    del exp._job_to_run_map[detached]
+    exp._field_columns.clear()
+    assert jobs.group_by("run")[(None,)]._job_ids == [detached]
+
+    run_file = next(iter(exp._run_paths))
+    old_name = exp._run_paths[run_file]
+    with open(run_file) as f:
+        run_data = json.load(f)
+    run_data["name"] = "renamed-run"
+    with open(run_file, "w") as f:
+        json.dump(run_data, f)
+    exp.refresh()
+
+    runs = {key[0] for key in exp.jobs().group_by("run")}
+    assert "renamed-run" in runs and old_name not in runs
+
+
+def test_job_collection_index_array(experiment: Experiment):
+    """Tests that collections hold job indices and slice them without copies."""
+    jobs = experiment.jobs()
+    job_ids = list(experiment._metadata["jobs"].ids)
+    assert jobs._indices.dtype == np.int32 and jobs._job_ids == job_ids
+
+    sliced = jobs[1::2]
+    assert np.shares_memory(sliced._indices, jobs._indices)
+    assert sliced._job_ids == job_ids[1::2]
+    assert jobs[-1].id == job_ids[-1] and jobs[::-1]._job_ids == job_ids[::-1]
+    with pytest.raises(IndexError):
+        jobs[len(job_ids)]
+    for collection in (jobs, jobs.filter(lambda job: True)):
+        with pytest.raises(ValueError):
+            collection[0:2:0]
+
+    filtered = jobs.filter(name__startswith="stage-A")
+    names = experiment._metadata["jobs"].names
+    assert [job.id for job in filtered] == [
+        job_id for job_id, name in zip(job_ids, names) if name.startswith("stage-A")
+    ]
+    assert filtered[:1]._indices.dtype == np.int32
+
+
+def test_prefix_index():
+    """Tests PrefixIndex lookups against str.startswith."""
+    values = ["abc", "ab", "b", None, "abd", "a\U0010ffffz", "ab"]
+    index = PrefixIndex(values)
+    for prefix in ("", "a", "ab", "abc", "b", "c", "None", "a\U0010ffff"):
+        expected = [i for i, value in enumerate(values) if str(value).startswith(prefix)]
+        assert index.lookup(prefix).tolist() == expected
+
+
+def test_get_job_by_short_id(experiment: Experiment):
+    """Tests short job ID lookups and prefix filters on IDs and names."""
+    job_ids = experiment.jobs()._job_ids
+    for job_id in job_ids:
+        length = 1
+        while sum(other.startswith(job_id[:length]) for other in job_ids) > 1:
+            length += 1
+        assert experiment.get_job(job_id[:length]).id == job_id
+        shared = [other for other in job_ids if other.startswith(job_id[: length - 1])]
+        if length > 1:
+            with pytest.raises(AmbiguousJobIDError) as excinfo:
+                experiment.get_job(job_id[: length - 1])
+            assert sorted(excinfo.value.job_ids) == sorted(shared)
+
+    with pytest.raises(KeyError):
+        experiment.get_job("no-such-job")
+    with pytest.raises(KeyError):
+        experiment.get_job("")
+
+    jobs = experiment.jobs()
+    for field in ("id", "name"):
+        for prefix in ("stage-A", job_ids[0][:3], ""):
+            found = jobs.filter(**{f"{field}__startswith": prefix})
+            assert found._job_ids == [
+                job.id for job in jobs if getattr(job, field).startswith(prefix)
+            ]
+
+
+def test_job_view_reads_shared_metadata(experiment: Experiment):
+    """Tests that job views are slotted and read the job table in place."""
+    table = experiment._metadata["jobs"]
+    for job in experiment.jobs():
+        assert not hasattr(job, "__dict__")
+        record = table[job.id]
+        params = table.params[table.index_of(job.id)]
+        assert job.params is params if params else job.params == {}
+        assert job.executables == record["executables"]
+        assert job.input_mappings is job.input_mappings
+        if job.stage_type == "simple":
+            assert job.executable_path == record["executables"]["main"].get("path")
+        else:
+            assert job.executable_path is None
+        assert job.effective_params is experiment.effective_params[job.id]
+        with pytest.raises(AttributeError):
+            job.no_such_field
+        for key, value in record.items():
+            assert table.field(table.index_of(job.id), key) == value
+            if key not in ("id", "name", "stage_type", "params", "outputs"):
+                assert getattr(job, key) == value